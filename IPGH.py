@@ -6,23 +6,52 @@ This example deals with returning content of section.
 #IMPORTS
 ###################################################################################################
 import os
+import sys
+import asyncio
 import datetime
 import webbrowser
 
 #Extractor
 from dataExtractors.theGuardianExtractor import TheGuardianExtractor
+from dataExtractors.bodyExtractor        import BodyExtractor
+from dataExtractors.eDocument            import EDocument
+from dataExtractors.queryTree            import parseQuery
+from tools.theguardian                   import theguardian_cache, theguardian_session, theguardian_taxonomy
 
 #Indexer
 from dataIndexer.indexer import Indexer
 
 #DB
-from dataDB.dbHandler import DBHandler
+from dataDB              import dbClient
+from dataDB.dbHandler    import DBHandler, AsyncDBHandler
+from dataDB.contentStore import ContentStore
 
 ###################################################################################################
 #CONSTANTS
 ###################################################################################################
-archivedDB = DBHandler('ArchivedDB')
-queryDB    = DBHandler('QueryDB')
+# Fork the body extraction workers on the main thread, before the database clients start their threads
+bodyStage    = BodyExtractor()
+bodyStage.start()
+# '--embedded' stores the collections in SQLite (dataDB/laclichev.db), no mongod required
+if '--embedded' in sys.argv:
+    dbClient.configure(backend='sqlite')
+incremental  = '--incremental' in sys.argv
+# The kept archive stores each content once, compressed, for ArchivedDB and the Index
+contentStore = ContentStore()
+archivedDB   = DBHandler('ArchivedDB', uniqueKey='url', contentStore=contentStore, indexed=True)
+# Only '--incremental' harvests into the kept archive, the other runs into a scratch collection emptied once indexed
+if incremental:
+    harvestName, harvestStore = 'ArchivedDB', contentStore
+else:
+    harvestName, harvestStore = 'HarvestDB', None
+harvestDB    = DBHandler(harvestName, uniqueKey='url', contentStore=harvestStore, indexed=True)
+queryDB      = DBHandler('QueryDB', indexed=True)
+# '--filter=environment,weather' resolves the names to section and tag ids, and only requests the articles
+# of any of these sections that also have any of these tags (the API ANDs the section and tag filters)
+filters      = [arg.split('=', 1)[1].split(',') for arg in sys.argv if arg.startswith('--filter=')]
+
+# Replay repeated requests from disk, '--offline' never reaches the network
+theguardian_session.set_cache(theguardian_cache.ResponseCache(offline='--offline' in sys.argv))
 
 ###################################################################################################
 #FUNCTIONS
@@ -40,40 +69,157 @@ def Menu():
     print(' e.g. storm, heavy storm, snow & (rain | storms), storm & ! snow')
     print (75 * "-")
 
+async def Harvest(extractor, fromDate):
+    """
+    Store the content as the pages arrive, each batch is written while the next one is harvested
+
+    :Returns:
+    - Name, url, date and tags of the articles stored (List of Dict)
+    """
+    loop       = asyncio.get_running_loop()
+    storage    = AsyncDBHandler(harvestName, uniqueKey='url', contentStore=harvestStore, indexed=True)
+    batches    = extractor.iterContent(fromDate=fromDate or 0, batchSize=500)
+    writing    = None
+    stored     = []
+    while True:
+        content = await loop.run_in_executor(None, next, batches, None)
+        if content is None:
+            break
+        # At most one batch is waiting to be written
+        if writing is not None:
+            await writing
+        writing     = asyncio.ensure_future(storage.Insert(content))
+        stored     += [{field: document[field] for field in ('name', 'url', 'date', 'tags')} for document in content]
+    if writing is not None:
+        await writing
+    storage.close()
+
+    return stored
+
+def OpenIndex():
+    """
+    Open the on-disk Index of the archive, an Index older than the current version is
+    created again and the whole archive is indexed again
+
+    :Returns:
+    - Indexer
+    """
+    documentIndexer = Indexer(verbose=True, contentStore=contentStore)
+    if documentIndexer.IsRecreated():
+        print('Indexing the archive again...')
+        documentIndexer.IndexDocs(archivedDB.IterDocuments(None, ['name', 'content', 'date', 'url', 'tags'],
+                                                           record=EDocument))
+    return documentIndexer
+
+def RefreshArchive():
+    """
+    Update the archived articles modified since they were stored, in ArchivedDB and in the Index
+    """
+    archived = {document['id']: document.get('lastModified', '')
+                for document in archivedDB.IterDocuments({"id": {"$exists": True, "$ne": ""}}, ["id", "lastModified"])}
+    print("Checking %d archived articles..." % len(archived))
+
+    refreshed = []
+    for refreshedContent in TheGuardianExtractor("", bodyExtractor=bodyStage).iterRefresh(archived, batchSize=500):
+        for document in refreshedContent:
+            archivedDB.Update({"id": document['id']}, document)
+        refreshed += refreshedContent
+
+    if refreshed:
+        documentIndexer = OpenIndex()
+        documentIndexer.IndexDocs(refreshed)
+    print("Refreshed %d articles." % len(refreshed))
+
 ###################################################################################################
 #MAIN
 ###################################################################################################
+# '--refresh' updates the archive and exits
+if '--refresh' in sys.argv:
+    RefreshArchive()
+    bodyStage.close()
+    sys.exit()
+
 # Print Menu
 Menu()
 # Get the search query
 userInput = input('What are you searching? ')
 
 #Generate The Guardian Query
-theGuardian        = TheGuardianExtractor(userInput)
-theGuardianContent = theGuardian.getContent()
+sections, tags = [], []
+if filters:
+    taxonomy       = theguardian_taxonomy.Taxonomy(TheGuardianExtractor.API)
+    sections, tags = taxonomy.resolve(filters[-1])
+theGuardian  = TheGuardianExtractor(userInput, bodyExtractor=bodyStage, sections=sections, tags=tags)
+queryTree    = theGuardian.getQueryTree()
+
+# '--incremental' answers the query from the local archive up to the newest watermark
+# of a query covering it, and only requests the articles published after it
+fromDate        = None
+archivedContent = []
+if incremental:
+    for watermark in queryDB.GetDocuments({"watermark": {"$exists": True}}):
+        if watermark['watermark'] == theGuardian.getQueryKey() or \
+           (not filters and 'query' in watermark and parseQuery(watermark['query']).covers(queryTree)):
+            if not fromDate or watermark['newest'] > fromDate:
+                fromDate = watermark['newest']
+
+    documentIndexer = OpenIndex()
+    # The index does not keep the sections, filtered queries are not answered locally
+    if fromDate and not filters:
+        archivedContent = documentIndexer.SearchTree(queryTree, toDate=fromDate)
+        print("Found %d archived document(s) published up to %s" % (len(archivedContent), fromDate))
+
+# Store the content as the pages arrive
+harvested    = asyncio.run(Harvest(theGuardian, fromDate))
+articlesSize = len(harvested)
+bodyStage.close()
 
 # Save the query to QueryDB
 queryDoc = { "query":theGuardian.getQuery(),
              "date":datetime.datetime.utcnow(),
-             "articlesSize": len(theGuardianContent),
-             "keys": theGuardian.getKeywords()
+             "articlesSize": articlesSize,
+             "keywords": theGuardian.getKeywords()
            }
 queryDB.Insert(queryDoc)
 
-if len(theGuardianContent) > 0:
-    print('\nStoring Content...')
-    archivedDB.Insert(theGuardianContent)
-    print('Content Stored.\n')
-    archivedDB.RemoveDuplicatesBy('name')
-
-    theGuardianContent = archivedDB.GetDocuments()
-    archivedDB.Empty()
+# Move the query's watermark to the newest article archived, the archive now answers the query up to it
+if incremental:
+    newestDate = theGuardian.getNewestDate()
+    if not newestDate or (fromDate and fromDate > newestDate):
+        newestDate = fromDate
+    if newestDate:
+        watermark = {"newest": newestDate}
+        if not filters:
+            watermark["query"] = userInput
+        queryDB.Update({"watermark": theGuardian.getQueryKey()}, watermark)
+
+# The query is answered by the archived articles up to the watermark and the articles harvested after it
+queryContent = {document['url']: document for document in archivedContent + harvested}
+print("\n%d article(s) answer the query: %d archived and %d harvested" % (len(queryContent), len(archivedContent),
+                                                                          articlesSize))
+for document in sorted(queryContent.values(), key=lambda document: document['date'], reverse=True)[:10]:
+    print("%s - %s" % (document['date'], document['name']))
+
+if articlesSize > 0:
+    print('\nContent Stored.\n')
+
+    # Stream only the indexed fields
+    indexFields = ['name', 'content', 'date', 'url', 'tags']
+    if incremental:
+        # Keep the archive and only index the new articles
+        theGuardianContent = harvestDB.IterDocuments({"date": {"$gt": fromDate}} if fromDate else None, indexFields,
+                                                     record=EDocument)
+    else:
+        theGuardianContent = harvestDB.IterDocuments(None, indexFields, record=EDocument)
 
     # Index Documents
     print('Indexing Documents...')
-    documentIndexer = Indexer(debug=True, verbose=True)
+    if not incremental:
+        documentIndexer = Indexer(debug=True, verbose=True)
     documentIndexer.IndexDocs(theGuardianContent)
     print('Indexing Done.\n')
+    if not incremental:
+        harvestDB.Empty()
 
     #Generate Frequency Matrix
     documentIndexer.FreqMatrix()
@@ -0,0 +1,202 @@
+"""
+Content Store module
+
+Single compressed copy of the article contents, keyed by the article url and
+shared by the archive (DBHandler) and the Index (Indexer).
+"""
+###################################################################################################
+#IMPORTS
+###################################################################################################
+import re
+import zlib
+import threading
+from   collections import Counter
+
+from dataDB.dbHandler import DBHandler
+
+###################################################################################################
+#CONSTANTS
+###################################################################################################
+DICT_SIZE  = 32 * 1024 # zlib window, larger dictionaries are not used
+TRAIN_SIZE = 64        # Documents needed to train the first dictionary
+LEVEL      = 6
+
+###################################################################################################
+#FUNCTIONS
+###################################################################################################
+def TrainDictionary(samples, size=DICT_SIZE):
+    """
+    Build a zlib preset dictionary from the most frequent phrases of the samples
+
+    :Parameters:
+    - `samples`: Sample contents. (List)
+    - `size`: Size of the dictionary in bytes. (Int)
+
+    :Returns:
+    - Dictionary (bytes)
+    """
+    counts = Counter()
+    for sample in samples:
+        words = re.findall(r"\S+\s*", sample)
+        for length in (1, 2, 3):
+            counts.update(''.join(words[idx:idx + length]) for idx in range(len(words) - length + 1))
+
+    # Keep the phrases saving the most bytes, seen in more than one place
+    phrases = [phrase for phrase, count in counts.items() if count > 1]
+    phrases.sort(key=lambda phrase: (counts[phrase] - 1) * len(phrase), reverse=True)
+    chosen  = []
+    used    = 0
+    for phrase in phrases:
+        encoded = phrase.encode('utf-8')
+        if used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+        if used >= size - 8:
+            break
+
+    # zlib finds the closest matches first, the most valuable phrases go last
+    return b''.join(reversed(chosen))
+
+###################################################################################################
+#CLASS
+###################################################################################################
+class ContentStore:
+    """
+    Content Store Class
+    """
+
+    def __init__(self, dbName='ContentDB', level=LEVEL):
+        """
+        :Parameters:
+        - `dbName`: Database's name, the dictionaries are kept in `dbName`Dict. (Str)
+        - `level`: zlib compression level. (Int)
+        """
+        self.__level     = level
+        self.__contentDB = DBHandler(dbName, uniqueKey='url')
+        self.__dictDB    = DBHandler(dbName + 'Dict', uniqueKey='dictId')
+        self.__dicts     = {0: None}
+        self.__lock      = threading.Lock()
+        for record in self.__dictDB.IterDocuments():
+            self.__dicts[record['dictId']] = record['zdict']
+        self.__dictId    = max(self.__dicts)
+
+    ##################################################
+    #Private Methods
+    ##################################################
+    def __compress(self, content):
+        """
+        Compress a content with the current dictionary
+
+        :Returns:
+        - Dictionary id (Int) and compressed content (bytes)
+        """
+        dictId = self.__dictId
+        zdict  = self.__dicts[dictId]
+        if zdict:
+            compressor = zlib.compressobj(self.__level, zdict=zdict)
+        else:
+            compressor = zlib.compressobj(self.__level)
+
+        return dictId, compressor.compress(content.encode('utf-8')) + compressor.flush()
+
+    def __decompress(self, record):
+        """
+        Decompress the content of a record
+        """
+        zdict = self.__dicts.get(record['dictId'])
+        if zdict is None and record['dictId'] != 0:
+            # Dictionary trained by another process
+            stored = self.__dictDB.FindOne({'dictId': record['dictId']})
+            zdict  = self.__dicts.setdefault(record['dictId'], stored['zdict'])
+        decompressor = zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+
+        return (decompressor.decompress(record['data']) + decompressor.flush()).decode('utf-8')
+
+    def __train(self, samples):
+        """
+        Train and register a new dictionary, called with the lock held
+        """
+        zdict = TrainDictionary(samples)
+        if not zdict:
+            return
+        dictId = max(self.__dicts) + 1
+        self.__dictDB.Insert({'dictId': dictId, 'zdict': zdict})
+        self.__dicts[dictId] = zdict
+        self.__dictId        = dictId
+
+    ##################################################
+    #Public Methods
+    ##################################################
+    def Train(self, samples):
+        """
+        Train a new dictionary, used by the contents stored from now on
+
+        :Parameters:
+        - `samples`: Sample contents. (List)
+        """
+        with self.__lock:
+            self.__train(samples)
+
+    def Put(self, documents):
+        """
+        Store the contents of the documents, replacing the stored contents of the same url
+
+        :Parameters:
+        - `documents`: Documents with 'url' and 'content' fields. (Dict | Dict List)
+        """
+        documents = documents if isinstance(documents, list) else [documents]
+        documents = [document for document in documents if document.get('content') is not None]
+        if any(document.get('url') is None for document in documents):
+            raise ValueError("The contents are stored by url, a document has no 'url' field.")
+        # The first dictionary is trained on the first stored documents, by a single writer
+        if len(documents) >= TRAIN_SIZE:
+            with self.__lock:
+                if self.__dictId == 0:
+                    self.__train([document['content'] for document in documents])
+        records = []
+        for document in documents:
+            dictId, data = self.__compress(document['content'])
+            records.append({'url': document['url'], 'dictId': dictId, 'data': data})
+        if records:
+            self.__contentDB.Insert(records)
+
+    def Get(self, url):
+        """
+        Read the content of an article
+
+        :Parameters:
+        - `url`: Article's url. (Str)
+
+        :Returns:
+        - Content (Str), None if it is not stored.
+        """
+        record = self.__contentDB.FindOne({'url': url})
+
+        return self.__decompress(record) if record else None
+
+    def GetMany(self, urls):
+        """
+        Read the contents of several articles at once
+
+        :Parameters:
+        - `urls`: Articles' urls. (List)
+
+        :Returns:
+        - Contents by url (Dict), without the urls not stored.
+        """
+        if not urls:
+            return {}
+
+        return {record['url']: self.__decompress(record)
+                for record in self.__contentDB.IterDocuments({'url': {'$in': list(urls)}})}
+
+    def Empty(self):
+        """
+        Remove every content and dictionary
+        """
+        with self.__lock:
+            self.__contentDB.Empty()
+            self.__dictDB.Empty()
+            self.__dicts  = {0: None}
+            self.__dictId = 0
@@ -0,0 +1,528 @@
+"""
+DataBase Backend module
+
+Storage backends of the DBHandler: MongoDB, and an embedded SQLite database
+keeping every document as a JSON column.
+"""
+###################################################################################################
+#IMPORTS
+###################################################################################################
+import json
+import base64
+import datetime
+
+#MongoDB
+from pymongo        import InsertOne, ReplaceOne
+from pymongo.errors import OperationFailure
+
+from dataDB         import dbClient
+
+###################################################################################################
+#CONSTANTS
+###################################################################################################
+OPERATORS = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+###################################################################################################
+#CLASS
+###################################################################################################
+class DBBackend:
+    """
+    Storage Backend Base Class
+
+    A backend stores the documents of a collection, its methods are the ones of
+    the DBHandler.
+    """
+
+    def RemoveDuplicatesBy(self, keyName, batchSize=1000):
+        raise NotImplementedError
+
+    def Insert(self, data):
+        raise NotImplementedError
+
+    def Update(self, query, data, upsert=True):
+        raise NotImplementedError
+
+    def FindOne(self, query):
+        raise NotImplementedError
+
+    def CreateIndex(self, field, multiKey=False):
+        raise NotImplementedError
+
+    def IterDocuments(self, query=None, fields=None, sortBy=None, batchSize=500, limit=None):
+        raise NotImplementedError
+
+    def Empty(self):
+        raise NotImplementedError
+
+class MongoBackend(DBBackend):
+    """
+    MongoDB Storage Backend Class
+    """
+
+    def __init__(self, dbName, uniqueKey=None):
+        """
+        :Parameters:
+        - `dbName`: Collection's name (Str)
+        - `uniqueKey`: Field identifying the documents (Str)
+        """
+        self.__uniqueKey = uniqueKey
+        self.__indexes   = set()
+        # Get the dbName Collection from the shared MongoDB Client (see dbClient.configure),
+        # created by MongoDB on its first write
+        self.__collection = dbClient.getCollection(dbName)
+
+        if uniqueKey:
+            try:
+                self.__collection.create_index(uniqueKey, unique=True)
+            except OperationFailure:
+                # Collection stored before the index existed, remove its duplicates once
+                self.RemoveDuplicatesBy(uniqueKey)
+                self.__collection.create_index(uniqueKey, unique=True)
+
+    def RemoveDuplicatesBy(self, keyName, batchSize=1000):
+        """
+        Remove duplicated documents from a Collection, see DBHandler
+        """
+        pipeline = [
+            {"$group": {
+                "_id": {
+                    keyName:"${0}".format(keyName)
+                },
+                "uniqueIds": {
+                    "$addToSet": "$_id"
+                },
+                "count": {
+                    "$sum": 1
+                }}
+            },
+            {"$match": {
+                "count": {"$gt": 1}}
+            }]
+
+        cursor = self.__collection.aggregate(pipeline, allowDiskUse=True)
+        duplicatedIds = []
+        for doc in cursor:
+            # Keep one document
+            del doc["uniqueIds"][0]
+            # Get the duplicated document's ID
+            duplicatedIds += doc["uniqueIds"]
+            if len(duplicatedIds) >= batchSize:
+                self.__collection.delete_many({"_id": {"$in": duplicatedIds}})
+                duplicatedIds = []
+        # Delete the remaining duplicated IDs
+        if duplicatedIds:
+            self.__collection.delete_many({"_id": {"$in": duplicatedIds}})
+
+    def Insert(self, data):
+        """
+        Insert a document to the Collection, see DBHandler
+        """
+        if self.__uniqueKey:
+            #Bulk Upsert, the duplicates replace each other at write time
+            data     = data if isinstance(data, list) else [data]
+            # Keep the last document of each key in the batch
+            requests = {}
+            for idx, doc in enumerate(data):
+                key = doc.get(self.__uniqueKey)
+                if key is None:
+                    requests[idx] = InsertOne(doc)
+                else:
+                    requests[(key,)] = ReplaceOne({self.__uniqueKey: key}, doc, upsert=True)
+            if requests:
+                self.__collection.bulk_write(list(requests.values()), ordered=False)
+        elif not isinstance(data, list):
+            #Item Insert
+            self.__collection.insert_one(data)
+        else:
+            #Bulk Insert
+            self.__collection.insert_many(data)
+
+    def Update(self, query, data, upsert=True):
+        """
+        Update the fields of the first document matching the query, see DBHandler
+        """
+        self.__collection.update_one(query, {"$set": data}, upsert=upsert)
+
+    def FindOne(self, query):
+        """
+        Get the first document matching the query, see DBHandler
+        """
+        return self.__collection.find_one(query)
+
+    def CreateIndex(self, field, multiKey=False):
+        """
+        Create a secondary index of a field, see DBHandler
+
+        MongoDB indexes every element of the array fields by itself.
+        """
+        self.__indexes.add(field)
+        self.__collection.create_index(field)
+
+    def IterDocuments(self, query=None, fields=None, sortBy=None, batchSize=500, limit=None):
+        """
+        Stream the documents of the Collection, see DBHandler
+        """
+        cursor = self.__collection.find(query if query else {}, fields, batch_size=batchSize, limit=limit or 0)
+        if sortBy:
+            cursor = cursor.sort(sortBy)
+        try:
+            for document in cursor:
+                yield document
+        finally:
+            cursor.close()
+
+    def Empty(self):
+        """
+        Remove all documents of the Collection, see DBHandler
+        """
+        self.__collection.drop()
+        if self.__uniqueKey:
+            self.__collection.create_index(self.__uniqueKey, unique=True)
+        for field in self.__indexes:
+            self.__collection.create_index(field)
+
+
+class SQLiteBackend(DBBackend):
+    """
+    Embedded SQLite Storage Backend Class
+
+    Every collection is a table of JSON documents. The filters support the
+    equality, $gt, $gte, $lt, $lte, $ne, $in, $all and $exists conditions on
+    top level fields. The elements of the multi key indexed fields are kept in
+    a side table by field, maintained by triggers, so matching an element is
+    an index lookup as well.
+    """
+
+    def __init__(self, dbName, uniqueKey=None):
+        """
+        :Parameters:
+        - `dbName`: Collection's name (Str)
+        - `uniqueKey`: Field identifying the documents (Str)
+        """
+        self.__uniqueKey  = uniqueKey
+        self.__dbName     = dbName
+        self.__table      = self.__quote(dbName)
+        self.__indexes    = set()
+        self.__multiKeys  = set()
+        self.__connection, self.__lock = dbClient.getConnection()
+
+        with self.__lock, self.__connection:
+            self.__connection.execute("CREATE TABLE IF NOT EXISTS {0} (_id INTEGER PRIMARY KEY, "
+                                      "key TEXT UNIQUE, doc TEXT NOT NULL)".format(self.__table))
+            if uniqueKey:
+                # Documents stored without the key, keep one document of each key
+                path    = self.__path(uniqueKey)
+                missing = self.__connection.execute("SELECT COUNT(*) FROM {0} WHERE key IS NULL AND "
+                                                    "json_type(doc, ?) IS NOT NULL".format(self.__table),
+                                                    (path,)).fetchone()[0]
+                if missing:
+                    self.__removeDuplicates(path)
+                    self.__connection.execute("UPDATE {0} SET key = json_extract(doc, ?) "
+                                              "WHERE key IS NULL".format(self.__table), (path,))
+
+    ##################################################
+    #Private Methods
+    ##################################################
+    @staticmethod
+    def __quote(name):
+        """
+        SQL identifier of a table or an index
+        """
+        return '"' + name.replace('"', '""') + '"'
+
+    @staticmethod
+    def __path(field):
+        """
+        JSON path of a top level field
+        """
+        return '$."' + field.replace('"', '\\"') + '"'
+
+    @staticmethod
+    def __literal(field):
+        """
+        JSON path of a top level field as a SQL literal
+        """
+        return "'" + SQLiteBackend.__path(field).replace("'", "''") + "'"
+
+    @staticmethod
+    def __dateColumn(field):
+        """
+        SQL expression of the ISO string of a date field, stored tagged with $date
+        """
+        return "json_extract(doc, " + SQLiteBackend.__literal(field)[:-1] + '."$date"\')'
+
+    @staticmethod
+    def __column(field):
+        """
+        SQL expression of a top level field, written as the expression of its index
+        so SQLite can use the index
+        """
+        if field == "_id":
+            return "_id"
+        return "json_extract(doc, " + SQLiteBackend.__literal(field) + ")"
+
+    def __removeDuplicates(self, path):
+        """
+        Keep one document of each value of a JSON path, the documents without it are all kept
+        """
+        self.__connection.execute("DELETE FROM {0} WHERE json_extract(doc, ?) IS NOT NULL AND _id NOT IN "
+                                  "(SELECT MIN(_id) FROM {0} WHERE json_extract(doc, ?) IS NOT NULL "
+                                  "GROUP BY json_extract(doc, ?))".format(self.__table), (path, path, path))
+
+    def __contains(self, field, values):
+        """
+        SQL condition matching the documents with an array field holding any of the values
+
+        :Returns:
+        - SQL condition (Str) and its parameters (List)
+        """
+        marks = ", ".join("?" * len(values))
+        if field in self.__multiKeys:
+            return ("_id IN (SELECT _id FROM {0} WHERE value IN ({1}))"
+                    .format(self.__quote(self.__dbName + "." + field), marks), list(values))
+        return ("EXISTS (SELECT 1 FROM json_each(doc, {0}) WHERE value IN ({1}))"
+                .format(self.__literal(field), marks), list(values))
+
+    @staticmethod
+    def __encode(value):
+        """
+        Dates are stored as ISO strings tagged with $date, bytes as base64 tagged with $binary
+        """
+        if isinstance(value, datetime.datetime):
+            return {"$date": value.isoformat()}
+        if isinstance(value, (bytes, bytearray)):
+            return {"$binary": base64.b64encode(value).decode("ascii")}
+        raise TypeError("Object of type %s is not JSON serializable" % type(value).__name__)
+
+    @staticmethod
+    def __decode(value):
+        if len(value) == 1 and "$date" in value:
+            return datetime.datetime.fromisoformat(value["$date"])
+        if len(value) == 1 and "$binary" in value:
+            return base64.b64decode(value["$binary"])
+        return value
+
+    def __dumps(self, document):
+        return json.dumps({key: value for key, value in document.items() if key != "_id"}, default=self.__encode)
+
+    def __loads(self, rowId, doc):
+        document = json.loads(doc, object_hook=self.__decode)
+        document["_id"] = rowId
+        return document
+
+    def __document(self, rowId, doc, fields):
+        """
+        Document of a row, without the projected fields it does not have
+        """
+        document = self.__loads(rowId, doc)
+        if fields:
+            document = {key: value for key, value in document.items() if value is not None}
+        return document
+
+    def __where(self, query):
+        """
+        Converts a filter to a SQL condition
+
+        :Parameters:
+        - `query`: Filter of the documents (Dict)
+
+        :Returns:
+        - SQL condition (Str) and its parameters (List)
+        """
+        conditions = []
+        parameters = []
+        for field, condition in (query or {}).items():
+            # The unique key is also kept, indexed, in the key column
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for operator, value in condition.items():
+                column = "key" if field == self.__uniqueKey else self.__column(field)
+                scalar = field in ("_id", self.__uniqueKey) or field in self.__indexes
+                values = value if isinstance(value, (list, tuple)) else [value]
+                if values and all(isinstance(element, datetime.datetime) for element in values):
+                    # The dates are compared by the ISO string of their $date tag
+                    column = self.__dateColumn(field)
+                    scalar = True
+                    value  = [element.isoformat() for element in values] if isinstance(value, (list, tuple)) \
+                             else value.isoformat()
+                if operator == "$all" or (not scalar and operator in ("$eq", "$in")):
+                    # As in MongoDB, an array field matches the values of its elements,
+                    # the fields without a scalar index may hold arrays
+                    if operator == "$all":
+                        groups = [[element] for element in value]
+                    else:
+                        groups = [list(value) if operator == "$in" else [value]]
+                    for group in groups:
+                        contains, values = self.__contains(field, group)
+                        conditions.append(contains)
+                        parameters += values
+                elif operator == "$eq":
+                    conditions.append(column + " = ?")
+                    parameters.append(value)
+                elif operator in OPERATORS:
+                    conditions.append("{0} {1} ?".format(column, OPERATORS[operator]))
+                    parameters.append(value)
+                elif operator == "$ne":
+                    # As in MongoDB, documents without the field are not equal
+                    conditions.append("({0} IS NULL OR {0} != ?)".format(column))
+                    parameters.append(value)
+                elif operator == "$in":
+                    conditions.append("{0} IN ({1})".format(column, ", ".join("?" * len(value))))
+                    parameters += list(value)
+                elif operator == "$exists":
+                    if field == "_id":
+                        conditions.append("1" if value else "0")
+                    else:
+                        conditions.append("json_type(doc, {0}) IS {1}NULL".format(self.__literal(field),
+                                                                                  "NOT " if value else ""))
+                else:
+                    raise ValueError("Filter operator %s is not supported by the SQLite backend." % operator)
+
+        return (" AND ".join(conditions) if conditions else "1"), parameters
+
+    ##################################################
+    #Public Methods
+    ##################################################
+    def RemoveDuplicatesBy(self, keyName, batchSize=1000):
+        """
+        Remove duplicated documents from a Collection, see DBHandler
+        """
+        with self.__lock, self.__connection:
+            self.__removeDuplicates(self.__path(keyName))
+
+    def Insert(self, data):
+        """
+        Insert a document to the Collection, see DBHandler
+        """
+        data = data if isinstance(data, list) else [data]
+        rows = [(document.get(self.__uniqueKey) if self.__uniqueKey else None, self.__dumps(document))
+                for document in data]
+        with self.__lock, self.__connection:
+            # Upsert, the duplicates replace each other at write time
+            self.__connection.executemany("INSERT INTO {0} (key, doc) VALUES (?, ?) ON CONFLICT(key) "
+                                          "DO UPDATE SET doc = excluded.doc".format(self.__table), rows)
+
+    def Update(self, query, data, upsert=True):
+        """
+        Update the fields of the first document matching the query, see DBHandler
+        """
+        where, parameters = self.__where(query)
+        with self.__lock, self.__connection:
+            row = self.__connection.execute("SELECT _id, doc FROM {0} WHERE {1} ORDER BY _id LIMIT 1"
+                                            .format(self.__table, where), parameters).fetchone()
+            if row is not None:
+                document = self.__loads(*row)
+                document.update(data)
+                key      = document.get(self.__uniqueKey) if self.__uniqueKey else None
+                self.__connection.execute("UPDATE {0} SET key = ?, doc = ? WHERE _id = ?".format(self.__table),
+                                          (key, self.__dumps(document), row[0]))
+            elif upsert:
+                # New document with the equality fields of the filter
+                document = {field: value for field, value in query.items() if not isinstance(value, dict)}
+                document.update(data)
+                key      = document.get(self.__uniqueKey) if self.__uniqueKey else None
+                self.__connection.execute("INSERT INTO {0} (key, doc) VALUES (?, ?)".format(self.__table),
+                                          (key, self.__dumps(document)))
+
+    def FindOne(self, query):
+        """
+        Get the first document matching the query, see DBHandler
+        """
+        for document in self.IterDocuments(query, batchSize=1):
+            return document
+        return None
+
+    def CreateIndex(self, field, multiKey=False):
+        """
+        Create a secondary index of a field, see DBHandler
+        """
+        index = self.__quote(self.__dbName + "." + field)
+        with self.__lock, self.__connection:
+            if not multiKey:
+                self.__indexes.add(field)
+                self.__connection.execute("CREATE INDEX IF NOT EXISTS {0} ON {1} ({2})"
+                                          .format(index, self.__table, self.__column(field)))
+                return
+
+            # Side table of the (element, document) pairs, kept up to date by triggers
+            self.__multiKeys.add(field)
+            exists = self.__connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                               (self.__dbName + "." + field,)).fetchone()
+            if exists:
+                return
+            names = {"side": index, "table": self.__table, "path": self.__literal(field)}
+            for suffix in ("_id", "insert", "update", "delete"):
+                names[suffix] = self.__quote(self.__dbName + "." + field + "." + suffix)
+            self.__connection.executescript("""
+                CREATE TABLE {side} (value, _id INTEGER, PRIMARY KEY (value, _id)) WITHOUT ROWID;
+                CREATE INDEX {_id} ON {side} (_id);
+                CREATE TRIGGER {insert} AFTER INSERT ON {table} BEGIN
+                    INSERT OR IGNORE INTO {side} SELECT value, new._id FROM json_each(new.doc, {path});
+                END;
+                CREATE TRIGGER {update} AFTER UPDATE OF doc ON {table} BEGIN
+                    DELETE FROM {side} WHERE _id = old._id;
+                    INSERT OR IGNORE INTO {side} SELECT value, new._id FROM json_each(new.doc, {path});
+                END;
+                CREATE TRIGGER {delete} AFTER DELETE ON {table} BEGIN
+                    DELETE FROM {side} WHERE _id = old._id;
+                END;
+                INSERT OR IGNORE INTO {side} SELECT value, {table}._id FROM {table}, json_each({table}.doc, {path});
+                """.format(**names))
+
+    def IterDocuments(self, query=None, fields=None, sortBy=None, batchSize=500, limit=None):
+        """
+        Stream the documents of the Collection, see DBHandler
+        """
+        where, whereParams = self.__where(query)
+        if fields:
+            # Only extract the requested fields of the JSON documents
+            fields       = [field for field in fields if field != "_id"]
+            select       = "json_object(" + ", ".join("?, json_extract(doc, ?)" for _ in fields) + ")"
+            selectParams = [value for field in fields for value in (field, self.__path(field))]
+        else:
+            select       = "doc"
+            selectParams = []
+        order = [self.__column(field) + (" DESC" if direction < 0 else "")
+                 for field, direction in ([(sortBy, 1)] if isinstance(sortBy, str) else (sortBy or []))]
+
+        indexed = [field for field in (query or {})
+                   if field in self.__indexes or field in self.__multiKeys or field == self.__uniqueKey]
+        if order or indexed:
+            # Select the matching ids at once, driven by the indexes, then read the documents by id
+            sql = "SELECT _id FROM {0} WHERE {1} ORDER BY {2}".format(self.__table, where, ", ".join(order + ["_id"]))
+            if limit is not None:
+                sql += " LIMIT {0:d}".format(limit)
+            with self.__lock:
+                rowIds = [row[0] for row in self.__connection.execute(sql, whereParams)]
+            for idx in range(0, len(rowIds), batchSize):
+                batch = rowIds[idx:idx + batchSize]
+                sql   = "SELECT _id, {0} FROM {1} WHERE _id IN ({2})".format(select, self.__table,
+                                                                           ", ".join("?" * len(batch)))
+                with self.__lock:
+                    rows = dict(self.__connection.execute(sql, selectParams + batch).fetchall())
+                for rowId in batch:
+                    if rowId in rows:
+                        yield self.__document(rowId, rows[rowId], fields)
+            return
+
+        lastId, count = 0, 0
+        while limit is None or count < limit:
+            size = batchSize if limit is None else min(batchSize, limit - count)
+            # Page on the row id, every batch is an index range scan
+            sql  = "SELECT _id, {0} FROM {1} WHERE _id > ? AND {2} ORDER BY _id LIMIT ?".format(
+                   select, self.__table, where)
+            with self.__lock:
+                rows = self.__connection.execute(sql, selectParams + [lastId] + whereParams + [size]).fetchall()
+            for rowId, doc in rows:
+                yield self.__document(rowId, doc, fields)
+            if len(rows) < size:
+                break
+            lastId  = rows[-1][0]
+            count  += len(rows)
+
+    def Empty(self):
+        """
+        Remove all documents of the Collection, see DBHandler
+        """
+        with self.__lock, self.__connection:
+            self.__connection.execute("DELETE FROM {0}".format(self.__table))
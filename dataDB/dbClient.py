@@ -0,0 +1,117 @@
+"""
+DataBase Client module
+
+Process wide MongoDB client or embedded SQLite connection, shared by every DBHandler.
+"""
+###################################################################################################
+#IMPORTS
+###################################################################################################
+import os
+import sqlite3
+import threading
+
+#MongoDB
+from pymongo               import MongoClient
+from pymongo.write_concern import WriteConcern
+
+###################################################################################################
+#CONSTANTS
+###################################################################################################
+URI           = "mongodb://localhost:27017"
+DATABASE      = "local"
+MAX_POOL_SIZE = 100
+BACKENDS      = ("mongo", "sqlite")
+SQLITE_PATH   = os.path.dirname(os.path.realpath(__file__)) + "/laclichev.db"
+
+_settings       = {"backend": "mongo", "uri": URI, "database": DATABASE, "maxPoolSize": MAX_POOL_SIZE,
+                   "writeConcern": None, "path": SQLITE_PATH}
+_client         = None
+_connection     = None
+_lock           = threading.Lock()
+_connectionLock = threading.Lock()
+
+###################################################################################################
+#FUNCTIONS
+###################################################################################################
+def configure(uri=None, database=None, maxPoolSize=None, writeConcern=None, backend=None, path=None):
+    """
+    Configure the shared client, before the first DBHandler is created or after close()
+
+    :Parameters:
+    - `uri`: MongoDB connection string, e.g. 'mongodb://localhost:27017' (Str)
+    - `database`: Database holding the collections (Str)
+    - `maxPoolSize`: Connections kept by the client (Int)
+    - `writeConcern`: Write concern of the collections, e.g. {'w': 1, 'j': False} (Dict)
+    - `backend`: 'mongo', or 'sqlite' to store the collections in an embedded database (Str)
+    - `path`: File of the embedded database, ':memory:' keeps it in RAM (Str)
+    """
+    if backend is not None and backend not in BACKENDS:
+        raise ValueError("Unknown backend %s, expected one of %s." % (backend, ", ".join(BACKENDS)))
+    with _lock:
+        if _client is not None or _connection is not None:
+            raise RuntimeError("The database client is already running, close() it first.")
+        for key, value in (("uri", uri), ("database", database), ("maxPoolSize", maxPoolSize),
+                           ("writeConcern", writeConcern), ("backend", backend), ("path", path)):
+            if value is not None:
+                _settings[key] = value
+
+def getBackend():
+    """
+    Return the configured storage backend, 'mongo' or 'sqlite'
+    """
+    return _settings["backend"]
+
+def getConnection():
+    """
+    Return the shared embedded database connection, opened on first use
+
+    :Returns:
+    - sqlite3.Connection and the Lock serializing its use
+    """
+    global _connection
+    with _lock:
+        if _connection is None:
+            _connection = sqlite3.connect(_settings["path"], check_same_thread=False)
+            # Readers do not block the writer
+            _connection.execute("PRAGMA journal_mode=WAL")
+            _connection.execute("PRAGMA synchronous=NORMAL")
+        return _connection, _connectionLock
+
+def getClient():
+    """
+    Return the shared client, connected on first use
+
+    :Returns:
+    - MongoClient
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            _client = MongoClient(_settings["uri"], maxPoolSize=_settings["maxPoolSize"])
+        return _client
+
+def getCollection(name):
+    """
+    Return a collection of the configured database
+
+    :Parameters:
+    - `name`: Collection's name (Str)
+
+    :Returns:
+    - Collection
+    """
+    writeConcern = WriteConcern(**_settings["writeConcern"]) if _settings["writeConcern"] else None
+    return getClient()[_settings["database"]].get_collection(name, write_concern=writeConcern)
+
+def close():
+    """
+    Close the shared client and its connections
+    """
+    global _client, _connection
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+        if _connection is not None:
+            _connection.close()
+            _connection = None
@@ -1,18 +1,117 @@
 """
 DataBase Document module
+
+Compact document records handed from the extractors to the database and the
+indexer. The fields live in __slots__ (no per instance dictionary), every
+record is read as a Mapping of its fields plus its schema version, and it has
+a binary form, the BSON of its values in field order.
 """
 ###################################################################################################
 #IMPORTS
 ###################################################################################################
+from collections.abc import Mapping
+
+#MongoDB BSON codec
+from bson import BSON
 
 ###################################################################################################
 #CONSTANTS
 ###################################################################################################
+SCHEMA = 'schema' # Field of the schema version in the dumped documents
 
 ###################################################################################################
 #CLASS
 ###################################################################################################
-class DBDocument:
+class Record(Mapping):
+    """
+    Document Record Base Class
+
+    The subclasses declare their `FIELDS`, in the order of the binary form, and
+    use them as __slots__. A new `VERSION` of a schema appends its fields to
+    FIELDS and gives their `DEFAULTS`, so the records of the previous versions
+    are still read.
+    """
+    __slots__ = ()
+    FIELDS    = ()
+    DEFAULTS  = {}
+    VERSION   = 1
+
+    def __getitem__(self, key):
+        if key == SCHEMA:
+            return self.VERSION
+        if key in self.FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from self.FIELDS
+        yield SCHEMA
+
+    def __len__(self):
+        return len(self.FIELDS) + 1
+
+    def __repr__(self):
+        return "{0}({1})".format(type(self).__name__, ", ".join("{0}={1!r}".format(field, getattr(self, field))
+                                                             for field in self.FIELDS if field != 'content'))
+
+    @classmethod
+    def __fromValues(cls, version, values):
+        """
+        Creates a record of the stored values of a schema version
+
+        :Parameters:
+        - `version`: Schema version of the values (Int)
+        - `values`: Value by field (Dict)
+        """
+        if version > cls.VERSION:
+            raise ValueError("%s schema version %d is newer than %d." % (cls.__name__, version, cls.VERSION))
+        record = cls.__new__(cls)
+        for field in cls.FIELDS:
+            if field in values:
+                setattr(record, field, values[field])
+            elif field in cls.DEFAULTS:
+                setattr(record, field, cls.DEFAULTS[field])
+            else:
+                raise ValueError("%s schema version %d has no field %s." % (cls.__name__, version, field))
+        return record
+
+    @classmethod
+    def fromDict(cls, document):
+        """
+        Creates a record of a stored document, the documents without a schema version are version 1
+
+        :Parameters:
+        - `document`: Stored document (Dict)
+        """
+        return cls.__fromValues(document.get(SCHEMA, 1), document)
+
+    @classmethod
+    def decode(cls, data):
+        """
+        Creates a record of its binary form
+
+        :Parameters:
+        - `data`: Record encoded by encode() (bytes)
+        """
+        document = BSON(data).decode()
+        return cls.__fromValues(document[SCHEMA], dict(zip(cls.FIELDS, document['values'])))
+
+    def encode(self):
+        """
+        Return the binary form of the record, its schema version and its values without the field names
+        """
+        document = {SCHEMA: self.VERSION, 'values': [getattr(self, field) for field in self.FIELDS]}
+        return BSON.encode(document)
+
+    def dictDump(self):
+        """
+        Return a Dictionary of the current object, with its schema version
+        """
+        document = {field: getattr(self, field) for field in self.FIELDS}
+        document[SCHEMA] = self.VERSION
+        return document
+
+class DBDocument(Record):
     """
     Contains all the article information to be stored in the database.
 
@@ -25,6 +124,9 @@ class DBDocument:
     :Returns:
         - An instance of :class:`~dbDocument.DBDocument`.
     """
+    FIELDS    = ('name', 'url', 'date', 'content', 'tags')
+    __slots__ = FIELDS
+
     def __init__(self, name, url, date, tags, content):
         self.name    = name
         self.url     = url
@@ -32,13 +134,7 @@ class DBDocument:
         self.content = content
         self.tags    = list(set(tags))
 
-    def dictDump(self):
-        """
-        Return a Dictionary of the current object
-        """
-        return self.__dict__
-
-class CDocument:
+class CDocument(Record):
     """
     :Curated Document:
     - Contains all the article information to be persistently stored in the database.
@@ -56,6 +152,9 @@ class CDocument:
     :Returns:
         - An instance of :class:`~dbDocument.CDocument`.
     """
+    FIELDS    = ('title', 'url', 'date', 'content', 'tags', 'qTags', 'cities', 'nEntities')
+    __slots__ = FIELDS
+
     def __init__(self, title, url, date, content, tags, qTags, cities, nEntities):
         self.title     = title
         self.url       = url
@@ -66,12 +165,6 @@ class CDocument:
         self.cities    = cities
         self.nEntities = nEntities
 
-    def dictDump(self):
-        """
-        Return a Dictionary of the current object
-        """
-        return self.__dict__
-
 ###################################################################################################
 #TEST
 ###################################################################################################
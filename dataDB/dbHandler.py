@@ -5,9 +5,11 @@ DataBase Handler module
 #IMPORTS
 ###################################################################################################
 import os
+import asyncio
+from   concurrent.futures import ThreadPoolExecutor
 
-#MongoDB
-from pymongo import MongoClient
+from dataDB           import dbClient
+from dataDB.dbBackend import MongoBackend, SQLiteBackend
 
 ###################################################################################################
 #CONSTANTS
@@ -19,82 +21,325 @@ from pymongo import MongoClient
 class DBHandler:
     """
     DataBase Handler Class
+
+    Stores the documents in MongoDB or, with dbClient.configure(backend='sqlite'),
+    in an embedded SQLite database that needs no mongod process.
     """
+    # Fields of the Find filters and whether they hold a list of values
+    FILTERS = (('date', False), ('source', False), ('tags', True), ('keywords', True))
 
-    def __init__(self, dbName):
+    def __init__(self, dbName, uniqueKey=None, contentStore=None, indexed=False):
         """
         :Parameters:
         - `dbName`: Database's name (Str)
+        - `uniqueKey`: Field identifying the documents, e.g. 'url' (Str). The documents
+                       inserted with an existing key replace the stored ones.
+        - `contentStore`: Keeps the 'content' of the documents compressed, once for the
+                          archive and the Index, by 'url' (ContentStore)
+        - `indexed`: Create and maintain the indexes of the Find filters (Boolean)
         """
-        #Start MongoDB Client (Default Host)
-        self.__mongoDB = MongoClient().local
-
-        # Get the dbName Collection
-        if dbName in self.__mongoDB.collection_names():
-            self.__collection = self.__mongoDB[dbName]
+        self.__uniqueKey    = uniqueKey
+        self.__contentStore = contentStore
+        if dbClient.getBackend() == 'sqlite':
+            self.__backend = SQLiteBackend(dbName, uniqueKey)
         else:
-            self.__mongoDB.create_collection(dbName)
-            self.__collection = self.__mongoDB[dbName]
+            self.__backend = MongoBackend(dbName, uniqueKey)
+        if indexed:
+            for field, multiKey in DBHandler.FILTERS:
+                self.CreateIndex(field, multiKey)
+
+    ##################################################
+    #Private Methods
+    ##################################################
+    @staticmethod
+    def __toDict(data):
+        """
+        Converts the document records (see dbDocument.Record) to the dictionaries written by the backends
+        """
+        if isinstance(data, list):
+            return [document if isinstance(document, dict) else document.dictDump() for document in data]
+        return data if isinstance(data, dict) else data.dictDump()
+
+    def __mergeKeywords(self, data):
+        """
+        Keep the query 'keywords' of the stored documents replaced by key, so the
+        documents harvested by several queries are found by the keywords of every one of them
+        """
+        documents = data if isinstance(data, list) else [data]
+        keyed     = {document[self.__uniqueKey]: idx for idx, document in enumerate(documents)
+                     if 'keywords' in document and document.get(self.__uniqueKey) is not None}
+        if not keyed:
+            return data
+        documents = list(documents)
+        for stored in self.__backend.IterDocuments({self.__uniqueKey: {'$in': list(keyed)}}, [self.__uniqueKey, 'keywords']):
+            idx            = keyed[stored[self.__uniqueKey]]
+            documents[idx] = dict(documents[idx], keywords=sorted(set(documents[idx]['keywords']) |
+                                                            set(stored.get('keywords') or [])))
+
+        return documents if isinstance(data, list) else documents[0]
+
+    def __splitContent(self, data):
+        """
+        Store the contents in the content store, return the documents without them.
+        The documents without a url keep their content inline.
+        """
+        documents = data if isinstance(data, list) else [data]
+        self.__contentStore.Put([document for document in documents
+                                 if 'content' in document and document.get('url') is not None])
+        documents = [{key: value for key, value in document.items() if key != 'content'}
+                     if document.get('url') is not None else document for document in documents]
+
+        return documents if isinstance(data, list) else documents[0]
+
+    def __joinContent(self, documents, batchSize):
+        """
+        Add the contents of the content store to a stream of documents, a batch at once
+        """
+        batch = []
+        for document in documents:
+            batch.append(document)
+            if len(batch) >= batchSize:
+                yield from self.__withContent(batch)
+                batch = []
+        yield from self.__withContent(batch)
 
-    def RemoveDuplicatesBy(self, keyName):
+    def __withContent(self, batch):
+        """
+        Add the contents of the content store to a batch of documents
+        """
+        contents = self.__contentStore.GetMany([document['url'] for document in batch if 'url' in document])
+        for document in batch:
+            if document.get('url') in contents:
+                document['content'] = contents[document['url']]
+        return batch
+
+    ##################################################
+    #Public Methods
+    ##################################################
+    def RemoveDuplicatesBy(self, keyName, batchSize=1000):
         """
         Remove duplicated documents from a Collection
+
+        :Parameters:
+        - `keyName`: Field identifying the documents (Str)
+        - `batchSize`: Number of documents removed at once (Int)
         """
-        pipeline = [
-            {"$group": {
-                "_id": {
-                    keyName:"${0}".format(keyName)
-                },
-                "uniqueIds": {
-                    "$addToSet": "$_id"
-                },
-                "count": {
-                    "$sum": 1
-                }}
-            }]
-
-        cursor = self.__collection.aggregate(pipeline)
-        duplicatedIds = []
-        for doc in cursor:
-            # Keep one document
-            del doc["uniqueIds"][0]
-            # Get the duplicated document's ID
-            for duplicatedID in doc["uniqueIds"]:
-                duplicatedIds.append(duplicatedID)
-        # Delete all duplicated IDs
-        self.__collection.remove({"_id": {"$in": duplicatedIds}})
+        self.__backend.RemoveDuplicatesBy(keyName, batchSize)
 
     def Insert(self, data):
         """
         Insert a document to the Collection
 
         :Parameters:
-        - `data`: Document to be inserted (Dict | Dict List)
+        - `data`: Document to be inserted (Dict | Record | List)
+                  With a `uniqueKey`, replaces the stored documents with the same key
+        """
+        data = self.__toDict(data)
+        if self.__uniqueKey:
+            data = self.__mergeKeywords(data)
+        if self.__contentStore is not None:
+            data = self.__splitContent(data)
+        self.__backend.Insert(data)
+
+    def Update(self, query, data, upsert=True):
+        """
+        Update the fields of the first document matching the query
+
+        :Parameters:
+        - `query`: Filter of the document to be updated (Dict)
+        - `data`: Fields to be set (Dict | Record), the query 'keywords' are added to the stored ones
+        - `upsert`: Insert the document if no document matches the query (Boolean)
+        """
+        data = self.__toDict(data)
+        if 'keywords' in data:
+            stored = next(iter(self.__backend.IterDocuments(query, ['keywords'], limit=1)), None)
+            if stored is not None:
+                data = dict(data, keywords=sorted(set(data['keywords']) | set(stored.get('keywords') or [])))
+        if self.__contentStore is not None:
+            data = self.__splitContent(data)
+        self.__backend.Update(query, data, upsert)
+
+    def FindOne(self, query):
+        """
+        Get the first document matching the query
+
+        :Parameters:
+        - `query`: Filter of the document (Dict)
+
+        :Returns:
+        - Document (Dict) or None
+        """
+        document = self.__backend.FindOne(query)
+        if document is not None and self.__contentStore is not None:
+            self.__withContent([document])
+        return document
+
+    def CreateIndex(self, field, multiKey=False):
+        """
+        Create a secondary index of a field, maintained on every write
+
+        :Parameters:
+        - `field`: Field to be indexed (Str)
+        - `multiKey`: The field holds a list of values, each one is indexed (Boolean)
+        """
+        self.__backend.CreateIndex(field, multiKey)
+
+    def IterDocuments(self, query=None, fields=None, sortBy=None, batchSize=500, limit=None, record=None):
         """
-        if not isinstance(data, list):
-            #Item Insert
-            self.__collection.insert_one(data)
+        Stream the documents of the Collection, without loading them all in memory
+
+        :Parameters:
+        - `query`: Optional filter of the documents (Dict)
+        - `fields`: Optional list of the fields to retrieve (List)
+        - `sortBy`: Optional field, or list of (field, direction) tuples, to sort by (Str | List)
+        - `batchSize`: Number of documents of each round trip to the server (Int)
+        - `limit`: Optional maximum number of documents (Int)
+        - `record`: Optional class the documents are read as, the documents stored with an
+                    older schema version are upgraded to the current one (dbDocument.Record)
+
+        :Returns:
+        - Generator of documents (Dict | Record)
+        """
+        if self.__contentStore is None or (fields and 'content' not in fields):
+            documents = self.__backend.IterDocuments(query, fields, sortBy, batchSize, limit)
         else:
-            #Bulk Insert
-            self.__collection.insert_many(data)
+            # The contents are read from the content store by url, the documents without a url keep theirs
+            if fields:
+                fields = list(fields) + ['url']
+            documents = self.__joinContent(self.__backend.IterDocuments(query, fields, sortBy, batchSize, limit),
+                                           batchSize)
+
+        return documents if record is None else (record.fromDict(document) for document in documents)
 
-    def GetDocuments(self):
+    def Find(self, fromDate=None, toDate=None, tags=None, source=None, keywords=None,
+             fields=None, sortBy=None, limit=None):
         """
-        Get all documents of the Collection
+        Stream the documents matching the filters, answered by the indexes of an `indexed` Collection
+
+        :Parameters:
+        - `fromDate`: Only documents dated from this date, compared as stored (Str | datetime)
+        - `toDate`: Only documents dated up to this date, compared as stored (Str | datetime)
+        - `tags`: Only documents with any of these tags (Str | List)
+        - `source`: Only documents of this source, e.g. 'theguardian' (Str)
+        - `keywords`: Only documents harvested by a query with any of these keywords (Str | List)
+        - `fields`: Optional list of the fields to retrieve (List)
+        - `sortBy`: Optional field, or list of (field, direction) tuples, to sort by (Str | List)
+        - `limit`: Optional maximum number of documents (Int)
+
+        :Returns:
+        - Generator of documents (Dict)
         """
-        dataList = []
-        cursor  = self.__collection.find({})
-        for document in cursor:
-            dataList.append(document)
+        query = {}
+        if fromDate is not None or toDate is not None:
+            query['date'] = {}
+            if fromDate is not None:
+                query['date']['$gte'] = fromDate
+            if toDate is not None:
+                query['date']['$lte'] = toDate
+        for field, values in (('tags', tags), ('keywords', keywords)):
+            if values:
+                query[field] = {'$in': [values] if isinstance(values, str) else list(values)}
+        if source is not None:
+            query['source'] = source
 
-        return dataList
+        return self.IterDocuments(query, fields, sortBy, limit=limit)
+
+    def GetDocuments(self, query=None, fields=None):
+        """
+        Get all documents of the Collection
+
+        :Parameters:
+        - `query`: Optional filter of the documents (Dict)
+        - `fields`: Optional list of the fields to retrieve (List)
+        """
+        return list(self.IterDocuments(query, fields))
 
     def Empty(self):
         """
         Remove all documents of the Collection
         """
-        self.__collection.drop()
+        self.__backend.Empty()
+
+class AsyncDBHandler:
+    """
+    Asyncio DataBase Handler Class
+
+    Awaitable DBHandler, the blocking database calls run on a small thread pool
+    so the event loop keeps harvesting and indexing while the writes complete.
+    """
+
+    def __init__(self, dbName, uniqueKey=None, contentStore=None, indexed=False, workers=4):
+        """
+        :Parameters:
+        - `dbName`: Database's name (Str)
+        - `uniqueKey`: Field identifying the documents, see DBHandler (Str)
+        - `contentStore`: Store of the documents' contents, see DBHandler (ContentStore)
+        - `indexed`: Maintain the indexes of the Find filters, see DBHandler (Boolean)
+        - `workers`: Concurrent database calls (Int)
+        """
+        self.__handler  = DBHandler(dbName, uniqueKey, contentStore, indexed)
+        self.__executor = ThreadPoolExecutor(max_workers=workers)
+
+    async def __run(self, function, *args):
+        """
+        Run a DBHandler method on the thread pool
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.__executor, function, *args)
+
+    async def Insert(self, data):
+        """
+        Insert a document to the Collection, see DBHandler.Insert
+        """
+        await self.__run(self.__handler.Insert, data)
+
+    async def Update(self, query, data, upsert=True):
+        """
+        Update the fields of the first document matching the query, see DBHandler.Update
+        """
+        await self.__run(self.__handler.Update, query, data, upsert)
+
+    async def FindOne(self, query):
+        """
+        Get the first document matching the query, see DBHandler.FindOne
+        """
+        return await self.__run(self.__handler.FindOne, query)
+
+    async def IterDocuments(self, query=None, fields=None, sortBy=None, batchSize=500, limit=None):
+        """
+        Stream the documents of the Collection, see DBHandler.IterDocuments
+
+        :Returns:
+        - Asynchronous generator of documents (Dict)
+        """
+        cursor = self.__handler.IterDocuments(query, fields, sortBy, batchSize, limit)
+        nextBatch = lambda: [document for _, document in zip(range(batchSize), cursor)]
+        try:
+            while True:
+                batch = await self.__run(nextBatch)
+                if not batch:
+                    break
+                for document in batch:
+                    yield document
+        finally:
+            cursor.close()
+
+    async def GetDocuments(self, query=None, fields=None):
+        """
+        Get all documents of the Collection, see DBHandler.GetDocuments
+        """
+        return await self.__run(self.__handler.GetDocuments, query, fields)
+
+    async def Empty(self):
+        """
+        Remove all documents of the Collection
+        """
+        await self.__run(self.__handler.Empty)
 
+    def close(self):
+        """
+        Wait for the pending calls and stop the thread pool
+        """
+        self.__executor.shutdown()
 
 ###################################################################################################
 #TEST
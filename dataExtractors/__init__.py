@@ -1,4 +1,4 @@
 """
 Data Extractor Package File
 """
-__all__ = ["theGuardianExtractor"]
+__all__ = ["extractor", "fanOut", "theGuardianExtractor"]
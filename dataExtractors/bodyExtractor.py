@@ -0,0 +1,136 @@
+"""
+Body Extractor module
+
+Converts the HTML body of the articles to plain text, off the main thread.
+"""
+###################################################################################################
+#IMPORTS
+###################################################################################################
+import threading
+import multiprocessing
+from   concurrent.futures import Future, ProcessPoolExecutor
+
+#Web Scrapping
+from   lxml import etree
+from   bs4  import BeautifulSoup
+
+###################################################################################################
+#FUNCTIONS
+###################################################################################################
+def lxmlBody(docBody):
+    """
+    Extract the text of the paragraphs of an HTML body, streaming it through lxml.
+
+    :Parameters:
+    - `docBody`: HTML body of the article. (Str)
+
+    :Return:
+    - Plain text, one paragraph per line. (Str)
+    """
+    if not docBody:
+        return ""
+    parser = etree.HTMLPullParser(events=('end',), tag='p')
+    parser.feed(docBody)
+    parser.close()
+
+    return ''.join([''.join(paragraph.itertext()) + "\n" for _, paragraph in parser.read_events()])
+
+def soupBody(docBody):
+    """
+    Extract the text of the paragraphs of an HTML body with BeautifulSoup.
+
+    :Parameters:
+    - `docBody`: HTML body of the article. (Str)
+
+    :Return:
+    - Plain text, one paragraph per line. (Str)
+    """
+    if not docBody:
+        return ""
+
+    return ''.join([paragraph.get_text() + "\n" for paragraph in BeautifulSoup(docBody, 'lxml').find_all('p')])
+
+def extractBodies(extract, docBodies):
+    """
+    Extract the text of a list of HTML bodies
+
+    :Parameters:
+    - `extract`: Extraction function. (Callable)
+    - `docBodies`: HTML bodies. (List)
+
+    :Return:
+    - List of plain texts.
+    """
+    return [extract(docBody) for docBody in docBodies]
+
+###################################################################################################
+#CLASS
+###################################################################################################
+class BodyExtractor:
+    """
+    Body Extraction Stage Class
+    """
+
+    def __init__(self, extract=lxmlBody, processes=None):
+        """
+        :Parameters:
+        - `extract`: Picklable function converting an HTML body to plain text. (Callable)
+        - `processes`: Number of worker processes, None for one per CPU and 0 to
+                       extract in the calling thread. (Int)
+        """
+        self.__extract   = extract
+        self.__processes = processes
+        self.__executor  = None
+        self.__lock      = threading.Lock()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def start(self):
+        """
+        Start the worker processes, before any thread is started if possible
+        """
+        with self.__lock:
+            if self.__executor is None and self.__processes != 0:
+                # Forked workers do not re-run the scripts importing the extractors
+                if 'fork' in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context('fork')
+                else:
+                    context = multiprocessing.get_context()
+                self.__executor = ProcessPoolExecutor(max_workers=self.__processes, mp_context=context)
+                # The pool forks its workers at the first task, fork them now
+                self.__executor.submit(extractBodies, self.__extract, []).result()
+
+    def submit(self, docBodies):
+        """
+        Schedule the extraction of a list of HTML bodies
+
+        :Parameters:
+        - `docBodies`: HTML bodies. (List)
+
+        :Return:
+        - Future of the list of plain texts.
+        """
+        if self.__processes == 0:
+            future = Future()
+            try:
+                future.set_result(extractBodies(self.__extract, docBodies))
+            except Exception as error:
+                future.set_exception(error)
+            return future
+
+        self.start()
+        return self.__executor.submit(extractBodies, self.__extract, docBodies)
+
+    def close(self):
+        """
+        Stop the worker processes
+        """
+        with self.__lock:
+            if self.__executor is not None:
+                self.__executor.shutdown()
+                self.__executor = None
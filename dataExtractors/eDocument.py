@@ -1,8 +1,9 @@
 """
 Document Object Definition
 """
+from dataDB.dbDocument import Record
 
-class EDocument(object):
+class EDocument(Record):
     """
     Contains all the article information to be stored in the database.
 
@@ -11,19 +12,26 @@ class EDocument(object):
     - `url`:     URL where the document has been extracted.
     - `date`:    Document's Publication Date.
     - `content`: Content of the document (Plain text data).
+    - `source`:  Name of the source of the document.
+    - `id`:      Document's id at the source.
+    - `lastModified`: Date of the last modification of the document at the source.
+    - `keywords`: Keywords of the query that harvested the document.
 
     :Returns:
         - An instance of :class:`~dataExtractors.document`.
     """
-    def __init__(self, name, url, date, tags, content):
-        self.name    = name
-        self.url     = url
-        self.date    = date
-        self.content = content
-        self.tags    = list(set(tags))
+    FIELDS    = ('name', 'url', 'date', 'content', 'tags', 'source', 'id', 'lastModified', 'keywords')
+    DEFAULTS  = {'source': '', 'id': '', 'lastModified': '', 'keywords': []}
+    VERSION   = 2
+    __slots__ = FIELDS
 
-    def dictDump(self):
-        """
-        Return a Dictionary of the current object
-        """
-        return self.__dict__
+    def __init__(self, name, url, date, tags, content, source='', id='', lastModified='', keywords=None):
+        self.name         = name
+        self.url          = url
+        self.date         = date
+        self.content      = content
+        self.tags         = list(set(tags))
+        self.source       = source
+        self.id           = id
+        self.lastModified = lastModified
+        self.keywords     = list(set(keywords or []))
@@ -0,0 +1,397 @@
+"""
+Extractor base module
+
+Common interface of the digital newspaper library extractors.
+"""
+###################################################################################################
+#IMPORTS
+###################################################################################################
+from   collections        import deque
+from   concurrent.futures import ThreadPoolExecutor
+
+from   dataExtractors.eDocument     import EDocument
+from   dataExtractors.queryTree     import parseQuery
+from   dataExtractors.bodyExtractor import BodyExtractor
+from   tools.progressBar            import ProgressBar
+
+###################################################################################################
+#CONSTANTS
+###################################################################################################
+
+###################################################################################################
+#CLASS
+###################################################################################################
+class Extractor:
+    """
+    Extractor Base Class
+
+    The user query is compiled once into a boolean tree (see queryTree), a
+    source implements its translation (translateQuery), the pagination
+    (getPages and getPage) and the reading of a page (parsePage). The base class
+    requests the pages concurrently, converts the HTML bodies to text in the
+    body extraction stage and yields batches of EDocument records.
+    """
+    SOURCE = ''
+
+    def __init__(self, query, workers=8, bodyExtractor=None, executor=None, limiter=None):
+        """
+        :Parameters:
+        - `query`: Request to be made to the source. (Str)
+                   Supports AND(&), OR(|) and NOT(!) operators, and exact phrase queries.
+        - `workers`: Number of pages requested concurrently. (Int)
+        - `bodyExtractor`: Stage converting the HTML bodies to plain text. (BodyExtractor)
+                           Defaults to the lxml extractor running on one process per CPU,
+                           stopped when each harvest ends.
+        - `executor`: Thread pool shared with other extractors, defaults to a pool
+                      of `workers` threads per harvest. (Executor)
+        - `limiter`: Rate limiter shared with other extractors, acquired before every
+                     page request. (RateLimiter)
+        """
+        self.__workers   = max(1, workers)
+        self.__ownsStage = bodyExtractor is None
+        self.__bodyStage = bodyExtractor if bodyExtractor is not None else BodyExtractor()
+        self.__executor  = executor
+        self.__limiter   = limiter
+        self.__newest    = None
+
+        self.__tree                   = parseQuery(query)
+        self.__query, self.__keywords = self.translateQuery(self.__tree)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    ##################################################
+    #Source Methods
+    ##################################################
+    def translateQuery(self, queryTree):
+        """
+        Translate the user query to the query language of the source
+
+        :Parameters:
+        - `queryTree`: Compiled user query. (QueryNode)
+
+        :Return:
+        - Query of the source (Str) and list of keywords of the query.
+        """
+        raise NotImplementedError
+
+    def getPages(self, fromDate, toDate):
+        """
+        Prepare the pagination of the query
+
+        :Parameters:
+        - `fromDate`: The start date for the search, 0 for no limit.
+        - `toDate`: The end date for the search, 0 for no limit.
+
+        :Return:
+        - Number of results (Int), first page response if already requested
+          (or None) and the tasks of the pages left to request. (Iterable)
+        """
+        raise NotImplementedError
+
+    def getChanged(self, archived):
+        """
+        Find the archived documents modified at the source since they were stored
+
+        :Parameters:
+        - `archived`: Modification date of the archived documents, by id. (Dict)
+
+        :Return:
+        - List of ids of the changed documents.
+        """
+        raise NotImplementedError
+
+    def getPagesById(self, docIds):
+        """
+        Prepare the pagination of a list of documents
+
+        :Parameters:
+        - `docIds`: Ids of the documents. (List)
+
+        :Return:
+        - Same as getPages.
+        """
+        raise NotImplementedError
+
+    def getPage(self, task):
+        """
+        Request a page, called from the worker threads
+
+        :Parameters:
+        - `task`: Page task returned by getPages.
+
+        :Return:
+        - Page response.
+        """
+        raise NotImplementedError
+
+    def parsePage(self, response, pB):
+        """
+        Read the documents of a page response
+
+        :Parameters:
+        - `response`: Page response.
+        - `pB`: Progress bar to be updated for every result. (ProgressBar)
+
+        :Return:
+        - List of (name, url, date, tags, id, lastModified) tuples and list of HTML
+          bodies of the page.
+        """
+        raise NotImplementedError
+
+    ##################################################
+    #Private Methods
+    ##################################################
+    def __fetch(self, task):
+        """
+        Request a page within the shared rate limit
+        """
+        return self.request(self.getPage, task)
+
+    def __pipeline(self, executor, tasks, first):
+        """
+        Request the pages concurrently, at most `workers` pages in flight.
+
+        :Parameters:
+        - `executor`: Thread pool. (Executor)
+        - `tasks`: Iterable of page tasks.
+        - `first`: Response already obtained, yielded before the tasks.
+
+        :Return:
+        - Generator of the page responses, in the order of the tasks.
+        """
+        tasks   = iter(tasks)
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(self.__fetch, task))
+            if len(pending) >= self.__workers:
+                break
+        if first is not None:
+            yield first
+        while pending:
+            response = pending.popleft().result()
+            # Refill the pipeline before handing the response over
+            for task in tasks:
+                pending.append(executor.submit(self.__fetch, task))
+                break
+            yield response
+
+    def __iterResponses(self, tasks, first=None):
+        """
+        Request the pages on the shared thread pool or on a pool of `workers` threads
+        """
+        if self.__executor is not None:
+            yield from self.__pipeline(self.__executor, tasks, first)
+        else:
+            with ThreadPoolExecutor(max_workers=self.__workers) as executor:
+                yield from self.__pipeline(executor, tasks, first)
+
+    def __createDocuments(self, documents, docContents):
+        """
+        Create the documents of a page once their bodies have been extracted
+
+        :Parameters:
+        - `documents`: List of (name, url, date, tags, id, lastModified) tuples.
+        - `docContents`: Future of the plain text of the documents. (Future)
+
+        :Return:
+        - List of documents.
+        """
+        bSONResult = []
+        for (docName, docUrl, docDate, docTags, docId, docModified), docContent in zip(documents, docContents.result()):
+            # Keep track of the newest publication retrieved
+            if self.__newest is None or docDate > self.__newest:
+                self.__newest = docDate
+            bSONResult.append(EDocument(docName, docUrl, docDate, docTags, docContent, self.SOURCE,
+                                        docId, docModified, self.__keywords))
+
+        return bSONResult
+
+    def __iterDocuments(self, total, first, tasks, batchSize):
+        """
+        Yields the Documents of the pages in batches, as the pages arrive.
+
+        No more than `workers` pages are in flight or waiting for their bodies to
+        be extracted, the HTML bodies of each page are converted to text while the
+        next pages are being requested.
+
+        :Parameters:
+        - `total`: Number of results. (Int)
+        - `first`: First page response if already requested, or None.
+        - `tasks`: Tasks of the pages left to request. (Iterable)
+        - `batchSize`: Number of documents of each batch. (Int)
+
+        :Return:
+        - Generator of lists of retrieved documents.
+        """
+        batch   = []
+        parsing = deque()
+        pB      = ProgressBar(total, prefix='Retrieving:')
+        for response in self.__iterResponses(tasks, first):
+            documents, docBodies = self.parsePage(response, pB)
+            parsing.append((documents, self.__bodyStage.submit(docBodies)))
+            # Collect the extracted pages, waiting only when too many are pending
+            while parsing and (len(parsing) > self.__workers or parsing[0][1].done()):
+                batch += self.__createDocuments(*parsing.popleft())
+                while len(batch) >= batchSize:
+                    yield batch[:batchSize]
+                    batch = batch[batchSize:]
+        while parsing:
+            batch += self.__createDocuments(*parsing.popleft())
+            while len(batch) >= batchSize:
+                yield batch[:batchSize]
+                batch = batch[batchSize:]
+        if batch:
+            yield batch
+
+    ##################################################
+    #Public Methods
+    ##################################################
+    def iterContent(self, fromDate=0, toDate=0, batchSize=200):
+        """
+        Yields the Documents obtained by the query in batches, as the pages arrive.
+
+        :Parameters:
+        - `fromDate`: The start date for the search, 0 for no limit.
+        - `toDate`: The end date for the search, 0 for no limit.
+        - `batchSize`: Number of documents of each batch. (Int)
+
+        :Return:
+        - Generator of lists of retrieved documents.
+        """
+        # Start the body extraction workers before the request threads
+        self.__bodyStage.start()
+        try:
+            total, first, tasks = self.getPages(fromDate, toDate)
+            if total > 0:
+                yield from self.__iterDocuments(total, first, tasks, batchSize)
+            else:
+                print("No results found")
+        finally:
+            self.close()
+
+    def iterRefresh(self, archived, batchSize=200):
+        """
+        Yields in batches the archived Documents changed at the source since they were stored.
+        Only the modification dates of the archived documents are requested, and the
+        full documents of the changed ones.
+
+        :Parameters:
+        - `archived`: Modification date of the archived documents, by id. (Dict)
+        - `batchSize`: Number of documents of each batch. (Int)
+
+        :Return:
+        - Generator of lists of refreshed documents.
+        """
+        self.__bodyStage.start()
+        try:
+            changed = self.getChanged(archived)
+            if changed:
+                total, first, tasks = self.getPagesById(changed)
+                yield from self.__iterDocuments(total, first, tasks, batchSize)
+            else:
+                print("No changes found")
+        finally:
+            self.close()
+
+    def getContent(self, fromDate=0, toDate=0):
+        """
+        Returns an array of Documents obtained by the query.
+
+        :Parameters:
+        - `fromDate`: The start date for the search, 0 for no limit.
+        - `toDate`: The end date for the search, 0 for no limit.
+
+        :Return:
+        - List of retrieved documents.
+        """
+        bSONResult = []
+        for batch in self.iterContent(fromDate, toDate):
+            bSONResult += batch
+
+        return bSONResult
+
+    def request(self, function, *args):
+        """
+        Make a request to the source within the shared rate limit
+
+        :Parameters:
+        - `function`: Request. (Callable)
+        - `args`: Arguments of the request.
+
+        :Return:
+        - Response of the request.
+        """
+        if self.__limiter is not None:
+            self.__limiter.acquire()
+        return function(*args)
+
+    def mapRequests(self, function, items):
+        """
+        Make a request for every item concurrently, on the shared thread pool or on
+        a pool of `workers` threads, within the shared rate limit
+
+        :Parameters:
+        - `function`: Request of an item. (Callable)
+        - `items`: Items to be requested. (Iterable)
+
+        :Return:
+        - List of responses, in the order of the items.
+        """
+        if self.__executor is not None:
+            return list(self.__executor.map(lambda item: self.request(function, item), items))
+        with ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            return list(executor.map(lambda item: self.request(function, item), items))
+
+    def close(self):
+        """
+        Stop the body extraction stage created by the extractor, a shared stage is
+        stopped by its owner
+        """
+        if self.__ownsStage:
+            self.__bodyStage.close()
+
+    def getQuery(self):
+        """
+        Return the query for the source
+        """
+        return self.__query
+
+    def getQueryTree(self):
+        """
+        Return the compiled user query, to be evaluated against the local archive
+        """
+        return self.__tree
+
+    def getKeywords(self):
+        """
+        Return a list of the keywords of the query
+        """
+        return self.__keywords
+
+    def getQueryKey(self):
+        """
+        Return the normalized query, used to identify the query between runs
+        """
+        return ' '.join(self.__query.lower().split())
+
+    def getNewestDate(self):
+        """
+        Return the newest publication date retrieved by the query (watermark)
+        """
+        return self.__newest
+
+    def getSource(self):
+        """
+        Return the name of the source
+        """
+        return self.SOURCE
+
+    def getWorkers(self):
+        """
+        Return the number of pages requested concurrently
+        """
+        return self.__workers
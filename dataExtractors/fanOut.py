@@ -0,0 +1,159 @@
+"""
+Fan-Out module
+
+Harvests a single user query from several digital newspaper libraries at once.
+"""
+###################################################################################################
+#IMPORTS
+###################################################################################################
+import queue
+import threading
+from   concurrent.futures import ThreadPoolExecutor
+
+from   dataExtractors.bodyExtractor import BodyExtractor
+from   tools.rateLimiter            import RateLimiter
+
+###################################################################################################
+#CONSTANTS
+###################################################################################################
+
+###################################################################################################
+#CLASS
+###################################################################################################
+class FanOut:
+    """
+    Fan-Out Extractor Class
+
+    Every source is harvested by its own driver thread while the pages of all
+    the sources share one thread pool, one rate limit budget and one body
+    extraction stage. The harvest takes about the time of the slowest source.
+    """
+
+    def __init__(self, query, sources, workers=16, maxRate=None, bodyExtractor=None):
+        """
+        :Parameters:
+        - `query`: Request to be made to every source. (Str)
+        - `sources`: Extractor classes to harvest, e.g. [TheGuardianExtractor]. (List)
+        - `workers`: Threads requesting pages, shared by all the sources. (Int)
+        - `maxRate`: Requests per second shared by all the sources, None for no
+                     budget besides the sources' own. (Float)
+        - `bodyExtractor`: Body extraction stage shared by all the sources. (BodyExtractor)
+                           Defaults to a stage of one process per CPU, stopped by close().
+        """
+        self.__executor   = ThreadPoolExecutor(max_workers=max(1, workers))
+        self.__limiter    = RateLimiter(maxRate) if maxRate else None
+        self.__ownsStage  = bodyExtractor is None
+        self.__bodyStage  = bodyExtractor if bodyExtractor is not None else BodyExtractor()
+        self.__extractors = [source(query, workers=workers, bodyExtractor=self.__bodyStage,
+                                    executor=self.__executor, limiter=self.__limiter) for source in sources]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    ##################################################
+    #Private Methods
+    ##################################################
+    @staticmethod
+    def __handOver(batches, item, stop):
+        """
+        Put an item in the queue of the consumer, unless the consumer stopped reading
+
+        :Return:
+        - False if the consumer stopped reading. (Boolean)
+        """
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    @staticmethod
+    def __drive(extractor, fromDate, toDate, batchSize, batches, stop):
+        """
+        Harvest a source, handing its batches over to the consumer
+
+        :Parameters:
+        - `extractor`: Source extractor. (Extractor)
+        - `batches`: Queue of (extractor, batch | exception) tuples, (extractor, None) when done.
+        - `stop`: Set when the consumer stopped reading. (Event)
+        """
+        try:
+            for batch in extractor.iterContent(fromDate, toDate, batchSize):
+                if not FanOut.__handOver(batches, (extractor, batch), stop):
+                    break
+        except Exception as error:
+            FanOut.__handOver(batches, (extractor, error), stop)
+        finally:
+            FanOut.__handOver(batches, (extractor, None), stop)
+
+    ##################################################
+    #Public Methods
+    ##################################################
+    def iterContent(self, fromDate=0, toDate=0, batchSize=200):
+        """
+        Yields the Documents of all the sources in batches, as they arrive.
+
+        :Parameters:
+        - `fromDate`: The start date for the search, 0 for no limit.
+        - `toDate`: The end date for the search, 0 for no limit.
+        - `batchSize`: Number of documents of each batch. (Int)
+
+        :Return:
+        - Generator of lists of retrieved documents, each batch from a single source.
+        """
+        batches = queue.Queue(maxsize=2 * len(self.__extractors))
+        stop    = threading.Event()
+        # Start the body extraction workers before the driver threads
+        self.__bodyStage.start()
+        drivers = [threading.Thread(target=self.__drive, args=(extractor, fromDate, toDate, batchSize, batches, stop),
+                                    daemon=True) for extractor in self.__extractors]
+        for driver in drivers:
+            driver.start()
+        try:
+            running = len(drivers)
+            while running > 0:
+                extractor, batch = batches.get()
+                if batch is None:
+                    running -= 1
+                elif isinstance(batch, Exception):
+                    raise batch
+                else:
+                    yield batch
+        finally:
+            stop.set()
+
+    def getContent(self, fromDate=0, toDate=0):
+        """
+        Returns an array of the Documents of all the sources.
+
+        :Parameters:
+        - `fromDate`: The start date for the search, 0 for no limit.
+        - `toDate`: The end date for the search, 0 for no limit.
+
+        :Return:
+        - List of retrieved documents.
+        """
+        bSONResult = []
+        for batch in self.iterContent(fromDate, toDate):
+            bSONResult += batch
+
+        return bSONResult
+
+    def getExtractors(self):
+        """
+        Return the extractors of the sources
+        """
+        return self.__extractors
+
+    def close(self):
+        """
+        Stop the shared thread pool, and the body extraction stage created by the fan-out
+        """
+        self.__executor.shutdown()
+        if self.__ownsStage:
+            self.__bodyStage.close()
@@ -0,0 +1,208 @@
+"""
+Query Tree module
+
+Compiles the user query into a boolean tree, shared by the extractors (remote
+query languages) and the Indexer (local archive search).
+"""
+###################################################################################################
+#IMPORTS
+###################################################################################################
+import re
+
+###################################################################################################
+#CONSTANTS
+###################################################################################################
+TOKENS = re.compile(r'"[^"]*"|[&|!()]|[^\s&|!()"]+')
+
+###################################################################################################
+#CLASS
+###################################################################################################
+class QueryNode(object):
+    """
+    Boolean Query Node Class
+    """
+    def __init__(self, *children):
+        self.children = tuple(children)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.children == other.children
+
+    def __hash__(self):
+        return hash((type(self).__name__, self.children))
+
+    def __repr__(self):
+        return "%s%r" % (type(self).__name__, self.children)
+
+    def terms(self):
+        """
+        Return the words of the query, in order of appearance
+        """
+        words = []
+        for child in self.children:
+            words += child.terms()
+        return words
+
+    def covers(self, other):
+        """
+        Check whether every document matching `other` also matches this query,
+        e.g. 'storm | rain' covers 'storm & wind'. The check is conservative,
+        False does not mean the query is not covered.
+
+        :Parameters:
+        - `other`: Query. (QueryNode)
+
+        :Return:
+        - Boolean
+        """
+        if self == other:
+            return True
+        if isinstance(other, Or):
+            return all(self.covers(child) for child in other.children)
+        if isinstance(other, And) and any(self.covers(child) for child in other.children):
+            return True
+        if isinstance(self, Or):
+            return any(child.covers(other) for child in self.children)
+        if isinstance(self, And):
+            return all(child.covers(other) for child in self.children)
+        if isinstance(self, Term) and isinstance(other, Phrase):
+            return self.children[0] in other.children
+        return False
+
+    def guardian(self):
+        """
+        Render the query with The Guardian API syntax
+        """
+        raise NotImplementedError
+
+class Term(QueryNode):
+    """
+    Single word
+    """
+    def __init__(self, word):
+        super(Term, self).__init__(word.lower())
+
+    def terms(self):
+        return [self.children[0]]
+
+    def guardian(self):
+        return self.children[0]
+
+class Phrase(QueryNode):
+    """
+    Exact phrase
+    """
+    def __init__(self, words):
+        super(Phrase, self).__init__(*[word.lower() for word in words])
+
+    def terms(self):
+        return list(self.children)
+
+    def guardian(self):
+        return '"' + ' '.join(self.children) + '"'
+
+class Not(QueryNode):
+    """
+    Negated query
+    """
+    def guardian(self):
+        child = self.children[0]
+        if isinstance(child, (And, Or)):
+            return "NOT (" + child.guardian() + ")"
+        return "NOT " + child.guardian()
+
+class And(QueryNode):
+    """
+    Conjunction of queries
+    """
+    def guardian(self):
+        return " AND ".join(["(" + child.guardian() + ")" if isinstance(child, Or) else child.guardian()
+                             for child in self.children])
+
+class Or(QueryNode):
+    """
+    Disjunction of queries
+    """
+    def guardian(self):
+        return " OR ".join(["(" + child.guardian() + ")" if isinstance(child, And) else child.guardian()
+                            for child in self.children])
+
+###################################################################################################
+#FUNCTIONS
+###################################################################################################
+def parseQuery(query):
+    """
+    Compile a user query into a boolean tree
+
+    Supports AND(&), OR(|) and NOT(!) operators, parentheses and exact phrases
+    between double quotes. Words next to each other are joined with AND, and
+    a query without operators is an exact phrase query.
+
+    :Parameters:
+    - `query`: User query. (Str)
+
+    :Return:
+    - Query tree. (QueryNode)
+    """
+    if not re.search(r'[&|!()"]', query):
+        return Phrase(query.split())
+
+    tokens = TOKENS.findall(query)
+    tree, position = _parseOr(tokens, 0)
+    if position < len(tokens):
+        raise ValueError("Unexpected '%s' in query: %s" % (tokens[position], query))
+
+    return tree
+
+def _join(node, children):
+    """
+    Create an And/Or node, flattening nested nodes of the same kind
+    """
+    flat = []
+    for child in children:
+        for grandChild in (child.children if type(child) is node else (child,)):
+            if grandChild not in flat:
+                flat.append(grandChild)
+
+    return flat[0] if len(flat) == 1 else node(*flat)
+
+def _parseOr(tokens, position):
+    children = []
+    while True:
+        child, position = _parseAnd(tokens, position)
+        children.append(child)
+        if position < len(tokens) and tokens[position] == '|':
+            position += 1
+        else:
+            return _join(Or, children), position
+
+def _parseAnd(tokens, position):
+    children = []
+    while True:
+        child, position = _parseUnary(tokens, position)
+        children.append(child)
+        if position < len(tokens) and tokens[position] == '&':
+            position += 1
+        elif position >= len(tokens) or tokens[position] in ('|', ')'):
+            return _join(And, children), position
+
+def _parseUnary(tokens, position):
+    if position >= len(tokens):
+        raise ValueError("Incomplete query")
+    token = tokens[position]
+    if token == '!':
+        child, position = _parseUnary(tokens, position + 1)
+        return (child.children[0] if isinstance(child, Not) else Not(child)), position
+    if token == '(':
+        child, position = _parseOr(tokens, position + 1)
+        if position >= len(tokens) or tokens[position] != ')':
+            raise ValueError("Unbalanced parentheses in query")
+        return child, position + 1
+    if token in ('&', '|', ')'):
+        raise ValueError("Unexpected '%s' in query" % token)
+    if token.startswith('"'):
+        words = token.strip('"').split()
+        if not words:
+            raise ValueError("Empty phrase in query")
+        return (Term(words[0]) if len(words) == 1 else Phrase(words)), position + 1
+
+    return Term(token), position + 1
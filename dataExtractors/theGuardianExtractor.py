@@ -5,131 +5,356 @@ API: b90595fd-be2a-4488-88bd-538a28af1be2
 ###################################################################################################
 #IMPORTS
 ###################################################################################################
-import re
-#Web Scrapping
-from   bs4 import BeautifulSoup
+import math
+import datetime
 
 #The Guardian API
-from   tools.theguardian        import theguardian_content
+from   tools.theguardian        import theguardian_content, theguardian_session
 
-from   dataExtractors.eDocument import EDocument
-from   tools.progressBar        import ProgressBar
+from   dataExtractors.extractor import Extractor
 
 ###################################################################################################
 #CONSTANTS
 ###################################################################################################
+ID_BATCH = 50 # Articles requested by id at once
 
 ###################################################################################################
 #CLASS
 ###################################################################################################
-class TheGuardianExtractor:
+class TheGuardianExtractor(Extractor):
     """
     The Guardian Extractor Class
     """
+    SOURCE = 'theguardian'
+    API    = 'b90595fd-be2a-4488-88bd-538a28af1be2'
 
-    def __init__(self, query):
+    def __init__(self, query, workers=8, shardSize=4000, bodyExtractor=None, executor=None, limiter=None,
+                 sections=None, tags=None):
         """
         :Parameters:
         - `query`: Request to be made to The Guardian API. (Str)
                    Supports AND(&), OR(|) and NOT(!) operators, and exact phrase queries.
+        - `workers`: Number of pages requested concurrently. (Int)
+        - `shardSize`: Queries with more results are split in date windows of about
+                       this many articles (Int). None disables the sharding.
+        - `bodyExtractor`: Stage converting the HTML bodies to plain text. (BodyExtractor)
+                           Defaults to the lxml extractor running on one process per CPU.
+        - `executor`: Thread pool shared with other extractors. (Executor)
+        - `limiter`: Rate limiter shared with other extractors. (RateLimiter)
+        - `sections`: Only request articles of these section ids, e.g. ['environment']. (List)
+        - `tags`: Only request articles with any of these tag ids, e.g. ['world/weather']. (List)
+                  Use Taxonomy.resolve() to find the ids of section and tag names. With both
+                  sections and tags, the articles must match both filters.
         """
+        super(TheGuardianExtractor, self).__init__(query, workers, bodyExtractor, executor, limiter)
         self.__contentTAG = 'content__article-body from-content-api js-article__body'
-        self.__API        = 'b90595fd-be2a-4488-88bd-538a28af1be2'
-        self.__keywords   = []
-        self.__query      = ''
-
-        #Check if the query contains conditional operators
-        if re.search(r'\&|\||\!|\(|\)', query):
-            #Remove all spaces from string
-            query = query.replace(" ", "")
-            for word in re.split(r'(\W)', query):
-                if   word == '&':
-                    self.__query += " AND "
-                elif word == '|':
-                    self.__query += " OR "
-                elif word == '!':
-                    self.__query += "NOT "
-                elif word.isalpha():
-                    self.__keywords.append(word)
-                    self.__query += word
-                else:
-                    self.__query += word
-        else:
-            self.__query = '"' + query + '"'
-
-    def getContent(self, fromDate=0, toDate=0):
-        """
-        Returns an array of Documents obtained by the query to The Guardian.
+        self.__API        = TheGuardianExtractor.API
+        self.__workers    = self.getWorkers()
+        self.__shardSize  = shardSize
+        self.__pageSize   = 200
+        self.__after      = None
+        self.__seen       = set()
+        self.__sections   = sorted(set(sections or []))
+        self.__tags       = sorted(set(tags or []))
+
+        # Keep a pooled connection alive for every worker
+        if self.__workers > theguardian_session.POOL_MAXSIZE:
+            theguardian_session.configure(pool_maxsize=self.__workers)
+
+    ##################################################
+    #Private Methods
+    ##################################################
+    def __getPage(self, weatherQuery, page):
+        """
+        Request a single page of the query to The Guardian API
+
+        :Parameters:
+        - `weatherQuery`: Query parameters. (Dict)
+        - `page`: Page number to be requested. (Int)
+
+        :Return:
+        - JSON response of the page. (Dict)
+        """
+        pageQuery = dict(weatherQuery, page=page)
+        content   = theguardian_content.Content(api=self.__API, **pageQuery)
+        return content.get_content_response()
+
+    def __getTotal(self, weatherQuery, orderBy=None):
+        """
+        Request the number of results of a query, without its content
+
+        :Parameters:
+        - `weatherQuery`: Query parameters. (Dict)
+        - `orderBy`: Optional order of the results. (Str)
+
+        :Return:
+        - Total of results (Int) and the publication date of the first result (Str)
+        """
+        probeQuery = {key:value for key, value in weatherQuery.items() if key not in ('show-fields', 'show-tags')}
+        probeQuery['page-size'] = 1
+        if orderBy:
+            probeQuery['order-by'] = orderBy
+        response   = self.__getPage(probeQuery, 1)['response']
+        firstDate  = response['results'][0]['webPublicationDate'] if response['results'] else None
+
+        return response['total'], firstDate
+
+    def __dateWindows(self, weatherQuery, startDate, endDate, total):
+        """
+        Split a date span in windows of about `shardSize` articles, newest first.
+        Windows still holding too many articles are split again.
+
+        :Parameters:
+        - `weatherQuery`: Query parameters. (Dict)
+        - `startDate`: First day of the span. (datetime.date)
+        - `endDate`: Last day of the span. (datetime.date)
+        - `total`: Number of articles published in the span. (Int)
+
+        :Return:
+        - List of (window query, window total) tuples.
+        """
+        # Assume an uniform publication rate over the span
+        days     = (endDate - startDate).days + 1
+        nWindows = max(1, min(days, int(math.ceil(total / self.__shardSize))))
+        step     = days / nWindows
+        windows  = []
+        for idx in range(nWindows):
+            wEnd   = endDate - datetime.timedelta(days=int(round(idx * step)))
+            wStart = endDate - datetime.timedelta(days=int(round((idx + 1) * step)) - 1)
+            windows.append((max(wStart, startDate), wEnd))
+
+        # Probe every window concurrently
+        def probe(window):
+            wQuery = dict(weatherQuery, **{'from-date':window[0].isoformat(), 'to-date':window[1].isoformat()})
+            return window, wQuery, self.__getTotal(wQuery)[0]
+        probed = self.mapRequests(probe, windows)
+
+        result = []
+        for window, wQuery, wTotal in probed:
+            if wTotal > 2 * self.__shardSize and window[0] < window[1]:
+                result += self.__dateWindows(weatherQuery, window[0], window[1], wTotal)
+            elif wTotal > 0:
+                result.append((wQuery, wTotal))
+
+        return result
+
+    @staticmethod
+    def __toDate(date):
+        """
+        Converts a date to datetime.date
+
+        :Parameters:
+        - `date`: Date (Str | datetime.date | datetime.datetime)
+
+        :Return:
+        - Date (datetime.date)
+        """
+        if isinstance(date, datetime.datetime):
+            return date.date()
+        if isinstance(date, datetime.date):
+            return date
+        return datetime.datetime.strptime(str(date)[:10], '%Y-%m-%d').date()
+
+    @staticmethod
+    def __apiDate(date):
+        """
+        Converts a date to The Guardian API format
+
+        :Parameters:
+        - `date`: Date (Str | datetime.date | datetime.datetime)
+
+        :Return:
+        - Date as YYYY-MM-DD (Str)
+        """
+        if isinstance(date, datetime.date):
+            date = date.strftime('%Y-%m-%d')
+        return str(date)[:10]
+
+    @staticmethod
+    def __apiTimestamp(date):
+        """
+        Converts a date with time to a publication timestamp
+
+        :Parameters:
+        - `date`: Date (Str | datetime.date | datetime.datetime)
+
+        :Return:
+        - Timestamp as YYYY-MM-DDTHH:MM:SSZ (Str), None if the date has no time
+        """
+        if isinstance(date, datetime.datetime):
+            return date.strftime('%Y-%m-%dT%H:%M:%SZ')
+        if isinstance(date, str) and len(date) > 10:
+            return date
+        return None
+
+    ##################################################
+    #Source Methods
+    ##################################################
+    def translateQuery(self, queryTree):
+        """
+        Translate the user query to The Guardian query syntax
+
+        :Parameters:
+        - `queryTree`: Compiled user query. (QueryNode)
+
+        :Return:
+        - Query for The Guardian API (Str) and list of keywords of the query.
+        """
+        return queryTree.guardian(), queryTree.terms()
+
+    def getPages(self, fromDate, toDate):
+        """
+        Request the first page of the query. Queries with more than `shardSize`
+        results are split in date windows, requested newest window first.
 
         :Parameters:
-        - `fromDate`: The start date for the search.
-        - `toDate`: The end date for the search.
+        - `fromDate`: The start date for the search, 0 for no limit. A timestamp
+                      (e.g. a query watermark) only keeps documents published after it.
+        - `toDate`: The end date for the search, 0 for no limit.
 
         :Return:
-        - List of retrieved documents.
+        - Number of results (Int), first page response (or None) and list of
+          (query, page) tasks.
         """
-        bSONResult   = []
-        weatherQuery = {'q':self.__query,
-                        'show-fields':'body',
+        weatherQuery = {'q':self.getQuery(),
+                        'show-fields':'body,lastModified',
                         'show-tags':'keyword',
-                        'page-size':200,
-                        'order-by':'newest',
-                        'page':1
+                        'page-size':self.__pageSize,
+                        'order-by':'newest'
                        }
+        # Push the taxonomy filters down to the API
+        if self.__sections:
+            weatherQuery['section'] = '|'.join(self.__sections)
+        if self.__tags:
+            weatherQuery['tag']     = '|'.join(self.__tags)
+        self.__after = None
+        self.__seen  = set()
+        if fromDate:
+            weatherQuery['from-date'] = self.__apiDate(fromDate)
+            self.__after              = self.__apiTimestamp(fromDate)
+        if toDate:
+            weatherQuery['to-date']   = self.__apiDate(toDate)
         # Get weather content
-        content  = theguardian_content.Content(api=self.__API, **weatherQuery)
-        response = content.get_content_response()
-        # Setup toolbar
-        toolbarLen = response['response']['total']
-        if toolbarLen > 0:
-            pages = response['response']['pages']
-            pB    = ProgressBar(toolbarLen, prefix='Retrieving:')
-            while True:
-                # Create documents from database
-                for itDoc in content.get_results(response):
-                    if itDoc['type'] == "article" :
-                        docName    = itDoc['webTitle']
-                        docUrl     = itDoc['webUrl']
-                        docDate    = itDoc['webPublicationDate']
-                        docBody    = itDoc['fields']['body']
-                        docTags    = []
-                        docContent = ""
-                        #Extract the Web Page body content
-                        for article in BeautifulSoup(docBody, 'lxml').find_all('p'):
-                            docContent = docContent + article.get_text() + "\n"
-                        # Extract Tags
-                        for tag in itDoc['tags']:
-                            try:
-                                docTags.append(tag['sectionId'])
-                            except:
-                                pass
-                        # Create Document
-                        bSON = EDocument(docName, docUrl, docDate, docTags, docContent).dictDump()
-                        bSONResult.append(bSON)
-                    pB.updateProgress()
-                # Check if there's more content to obtain
-                if weatherQuery['page'] < pages:
-                    weatherQuery['page'] += 1
-                    content  = theguardian_content.Content(api=self.__API, **weatherQuery)
-                    response = content.get_content_response()
-                else:
-                    break
-        else:
-            print("No results found")
+        response = self.request(self.__getPage, weatherQuery, 1)
+        total    = response['response']['total']
+        tasks    = [(weatherQuery, page) for page in range(2, response['response']['pages'] + 1)]
+        if total > 0 and self.__shardSize and total > self.__shardSize:
+            # Split the query's time span in date windows
+            endDate   = self.__toDate(toDate if toDate else response['response']['results'][0]['webPublicationDate'])
+            startDate = self.__toDate(fromDate if fromDate else self.request(self.__getTotal, weatherQuery, 'oldest')[1])
+            windows   = self.__dateWindows(weatherQuery, startDate, min(endDate, datetime.date.today()), total)
+            tasks     = [(wQuery, page) for wQuery, wTotal in windows
+                                        for page in range(1, int(math.ceil(wTotal / self.__pageSize)) + 1)]
+            total     = sum(wTotal for wQuery, wTotal in windows)
+            response  = None
 
-        return bSONResult if isinstance(bSONResult, list) else [bSONResult]
+        return total, response, tasks
 
-    def getQuery(self):
+    def getQueryKey(self):
         """
-        Return the query for The Guardian API
+        Return the normalized query and its section and tag filters
         """
-        return self.__query
+        queryKey = super(TheGuardianExtractor, self).getQueryKey()
+        if self.__sections:
+            queryKey += ' section:' + '|'.join(self.__sections)
+        if self.__tags:
+            queryKey += ' tag:' + '|'.join(self.__tags)
+        return queryKey
 
-    def getKeywords(self):
+    def getFilters(self):
         """
-        Return a list of the keywords of the query
+        Return the section and tag ids the query is restricted to
         """
-        return self.__keywords
+        return self.__sections, self.__tags
+
+    def getChanged(self, archived):
+        """
+        Request the modification date of the archived articles, `ID_BATCH` ids at once
+
+        :Parameters:
+        - `archived`: Modification date of the archived articles, by id. (Dict)
+
+        :Return:
+        - List of ids of the articles modified since they were archived.
+        """
+        docIds = sorted(archived)
+        chunks = [docIds[idx:idx + ID_BATCH] for idx in range(0, len(docIds), ID_BATCH)]
+
+        def probe(chunk):
+            idsQuery = {'ids':','.join(chunk), 'show-fields':'lastModified', 'page-size':ID_BATCH}
+            return theguardian_content.Content.get_results(self.__getPage(idsQuery, 1))
+        changed = [itDoc['id'] for results in self.mapRequests(probe, chunks) for itDoc in results
+                   if itDoc.get('fields', {}).get('lastModified', '') > (archived[itDoc['id']] or '')]
+
+        return changed
+
+    def getPagesById(self, docIds):
+        """
+        Prepare the requests of a list of articles, `ID_BATCH` ids per page
+
+        :Parameters:
+        - `docIds`: Ids of the articles. (List)
+
+        :Return:
+        - Number of articles (Int), None and list of (query, page) tasks.
+        """
+        self.__after = None
+        self.__seen  = set()
+        tasks        = [({'ids':','.join(docIds[idx:idx + ID_BATCH]),
+                          'show-fields':'body,lastModified',
+                          'show-tags':'keyword',
+                          'page-size':ID_BATCH}, 1) for idx in range(0, len(docIds), ID_BATCH)]
+
+        return len(docIds), None, tasks
+
+    def getPage(self, task):
+        """
+        Request a (query, page) task to The Guardian API
+        """
+        return self.__getPage(*task)
+
+    def parsePage(self, response, pB):
+        """
+        Read the documents of a page response
+
+        :Parameters:
+        - `response`: JSON response of a page. (Dict)
+        - `pB`: Progress bar to be updated. (ProgressBar)
+
+        :Return:
+        - List of (name, url, date, tags, id, lastModified) tuples and list of HTML
+          bodies of the page.
+        """
+        documents = []
+        docBodies = []
+        for itDoc in theguardian_content.Content.get_results(response):
+            # Skip the articles returned twice at date window boundaries
+            if itDoc['id'] in self.__seen:
+                pB.updateProgress()
+                continue
+            self.__seen.add(itDoc['id'])
+            if itDoc['type'] == "article" :
+                docDate     = itDoc['webPublicationDate']
+                if self.__after is not None and docDate <= self.__after:
+                    pB.updateProgress()
+                    continue
+                docName     = itDoc['webTitle']
+                docUrl      = itDoc['webUrl']
+                docBody     = itDoc['fields']['body']
+                docId       = itDoc['id']
+                docModified = itDoc['fields'].get('lastModified', docDate)
+                docTags     = []
+                # Extract Tags
+                for tag in itDoc['tags']:
+                    try:
+                        docTags.append(tag['sectionId'])
+                    except:
+                        pass
+                documents.append((docName, docUrl, docDate, docTags, docId, docModified))
+                docBodies.append(docBody)
+            pB.updateProgress()
+
+        return documents, docBodies
 
 ###################################################################################################
 #TEST
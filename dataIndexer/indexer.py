@@ -17,30 +17,34 @@ to use Lucene's text indexing and searching capabilities from Python
 import os
 import time
 import datetime
-import math
 import sys
+import threading
+from   concurrent.futures import ThreadPoolExecutor
 sys.path.insert(1, os.getcwd())
 
 # Lucene
 import lucene
 
 from java.nio.file                              import Paths
+from java.util                                  import HashSet
 from org.apache.lucene.analysis.standard        import StandardAnalyzer
 from org.apache.lucene.analysis.snowball        import SnowballFilter
 from org.apache.lucene.analysis.tokenattributes import CharTermAttribute
 from org.apache.lucene.document                 import Document, TextField, Field, LongPoint, StringField, FieldType
-from org.apache.lucene.index                    import IndexWriter, IndexWriterConfig, IndexReader, DirectoryReader, Term, IndexOptions, TermsEnum
+from org.apache.lucene.index                    import IndexWriter, IndexWriterConfig, IndexReader, Term, IndexOptions, TermsEnum, LeafReaderContext
 from org.apache.lucene.store                    import SimpleFSDirectory, RAMDirectory
 from org.apache.lucene.util                     import BytesRefIterator
-from org.apache.lucene.search                   import IndexSearcher
+from org.apache.lucene.search                   import BooleanQuery, BooleanClause, MatchAllDocsQuery, SearcherManager, SearcherFactory
 from org.apache.lucene.queryparser.classic      import QueryParser
 
 # Natural Language Toolkit
 import nltk
 
-from dataDB.dbHandler  import DBHandler
-from tools.progressBar import ProgressBar
-from tools.dtExplorer  import DTExplorer
+from dataIndexer.matrixStore   import MatrixStore
+from dataIndexer.termDocMatrix import TermDocMatrix
+from dataExtractors            import queryTree as qt
+from tools.progressBar         import ProgressBar
+from tools.dtExplorer          import DTExplorer
 
 # Geocoding
 from dataEnhancer.geocode import Geocode
@@ -48,6 +52,9 @@ from dataEnhancer.geocode import Geocode
 ###################################################################################################
 #CONSTANTS
 ###################################################################################################
+VECTOR_CHUNK  = 500            # Documents of each FreqMatrix task
+INDEX_VERSION = 2              # Fields' options of the Index, see Indexer.IsRecreated
+VERSION_FILE  = "indexVersion" # File of the INDEX_VERSION of an on-disk Index
 
 ###################################################################################################
 #CLASS
@@ -56,16 +63,19 @@ class Indexer:
     """
     Indexer Class
     """
-    (NAME, CONTENT, DATE, URL, TAGS, TIMESTAMP) = ("name", "content", "date", "url", "tags", "timestamp")
+    (NAME, CONTENT, DATE, URL, TAGS, TIMESTAMP, STEM) = ("name", "content", "date", "url", "tags", "timestamp", "stem")
 
-    def __init__(self, indexDir="", debug=False, verbose=False):
+    def __init__(self, indexDir="", debug=False, verbose=False, contentStore=None):
         """
         :Parameters:
         - `indexDir`: Path where the Index will be saved. (Str)
         - `debug`: Create the Index in RAM Memory (indexDir will be ignored). (Boolean)
         - `verbose`: Provide additional information about the initialization process. (Boolean)
+        - `contentStore`: Store holding the documents' contents (ContentStore). The Index
+                          then keeps only what the search needs, the contents are read by url.
         """
-        self.__verbose = verbose
+        self.__verbose      = verbose
+        self.__contentStore = contentStore
         if indexDir != "":
             INDEX_DIR = indexDir
         else:
@@ -88,28 +98,127 @@ class Indexer:
             # Store an index on disk
             self.__indexDir = SimpleFSDirectory(Paths.get(INDEX_DIR))
 
-        # Create Content FieldType
+        # Create Content FieldType, positions answer the phrase queries
         self.__contentType = FieldType()
-        self.__contentType.setIndexOptions(IndexOptions.DOCS_AND_FREQS)
+        self.__contentType.setIndexOptions(IndexOptions.DOCS_AND_FREQS_AND_POSITIONS)
         self.__contentType.setTokenized(True)
-        self.__contentType.setStored(True)
-        self.__contentType.setStoreTermVectors(True)
-        self.__contentType.setStoreTermVectorPositions(True)
+        self.__contentType.setStored(contentStore is None)
         self.__contentType.freeze()
 
+        # Create Stemmed Content FieldType, only its term vectors are read (FreqMatrix)
+        self.__stemType = FieldType()
+        self.__stemType.setIndexOptions(IndexOptions.DOCS)
+        self.__stemType.setTokenized(True)
+        self.__stemType.setStored(False)
+        self.__stemType.setStoreTermVectors(True)
+        self.__stemType.freeze()
+
         # Get the Analyzer
         self.__analyzer = StandardAnalyzer(StandardAnalyzer.ENGLISH_STOP_WORDS_SET)
+        # Stems of the content, its token streams are not shared with the writer's analyzer
+        self.__stemAnalyzer = StandardAnalyzer(StandardAnalyzer.ENGLISH_STOP_WORDS_SET)
+        # Shared searcher, opened on the first search and reopened when the index changes
+        self.__searcherManager = None
+        self.__managerLock     = threading.Lock()
+
+        # The content of an Index older than INDEX_VERSION has no positions and may only be kept
+        # by the Index, its fields cannot be updated: the Index is created again, empty
+        self.__recreated = False
+        if not debug:
+            versionPath = os.path.join(INDEX_DIR, VERSION_FILE)
+            if self.__boAppend and self.__indexVersion(versionPath) < INDEX_VERSION:
+                print("Index version is older than %d, the Index is created again" % INDEX_VERSION)
+                writerConfig = IndexWriterConfig(self.__analyzer)
+                writerConfig.setOpenMode(IndexWriterConfig.OpenMode.CREATE)
+                IndexWriter(self.__indexDir, writerConfig).close()
+                self.__boAppend  = False
+                self.__recreated = True
+            with open(versionPath, 'w') as versionFile:
+                versionFile.write(str(INDEX_VERSION))
 
         # Print Indexer Information
         print("Lucene version is: ", lucene.VERSION)
         print("Index Directory: ", INDEX_DIR)
 
     def __del__(self):
+        if self.__searcherManager is not None:
+            self.__searcherManager.close()
         self.__indexDir.close()
 
     ##################################################
     #Private Methods
     ##################################################
+    def __acquire(self):
+        """
+        Get the current searcher of the Index, release it with __release
+
+        :Returns:
+        - IndexSearcher
+        """
+        with self.__managerLock:
+            if self.__searcherManager is None:
+                self.__searcherManager = SearcherManager(self.__indexDir, SearcherFactory())
+                return self.__searcherManager.acquire()
+        # Only reopens the changed segments, when the index has changed
+        self.__searcherManager.maybeRefresh()
+        return self.__searcherManager.acquire()
+
+    def __release(self, searcher):
+        """
+        Release a searcher obtained by __acquire
+        """
+        self.__searcherManager.release(searcher)
+
+    @staticmethod
+    def __indexVersion(versionPath):
+        """
+        Read the INDEX_VERSION of an on-disk Index, 1 for the Indexes created before it was recorded
+        """
+        try:
+            with open(versionPath) as versionFile:
+                return int(versionFile.read().strip())
+        except (IOError, ValueError):
+            return 1
+
+    @staticmethod
+    def __fieldSet(fields):
+        """
+        Java Set of the stored fields to load
+        """
+        fieldSet = HashSet()
+        for field in fields:
+            fieldSet.add(field)
+        return fieldSet
+
+    def __loadFields(self, searcher, docIds, fields):
+        """
+        Load the requested stored fields of the documents
+
+        :Parameters:
+        - `searcher`: Searcher obtained by __acquire.
+        - `docIds`: Documents' index IDs (List).
+        - `fields`: Fields to retrieve (List).
+
+        :Return:
+        - List of fields by name (Dict), in the order of docIds.
+        """
+        # The contents of the content store are read by url
+        fromStore = self.__contentStore is not None and Indexer.CONTENT in fields
+        fieldSet  = self.__fieldSet(list(fields) + ([Indexer.URL] if fromStore else []))
+        documents = []
+        urls      = []
+        for docId in docIds:
+            doc = searcher.doc(docId, fieldSet)
+            documents.append({field: doc.get(field) for field in fields})
+            urls.append(doc.get(Indexer.URL))
+        if fromStore:
+            contents = self.__contentStore.GetMany([url for url in urls if url])
+            for document, url in zip(documents, urls):
+                # Documents indexed without the content store keep their content in the Index
+                document[Indexer.CONTENT] = contents.get(url, document[Indexer.CONTENT])
+
+        return documents
+
     @staticmethod
     def __getTimestamp(dateTime):
         """
@@ -160,6 +269,93 @@ class Indexer:
             sTags += tag + '|'
         return sTags[:-1]
 
+    def __textQuery(self, text):
+        """
+        Creates a query matching a word or an exact phrase in the document's name or content
+
+        :Parameters:
+        - `text`: Word or phrase (Str)
+
+        :Return:
+        - Lucene Query
+        """
+        builder = BooleanQuery.Builder()
+        for field in (Indexer.NAME, Indexer.CONTENT):
+            builder.add(QueryParser(field, self.__analyzer).parse(text), BooleanClause.Occur.SHOULD)
+        return builder.build()
+
+    def __treeQuery(self, queryTree):
+        """
+        Converts a query tree to a Lucene BooleanQuery
+
+        :Parameters:
+        - `queryTree`: Compiled user query (QueryNode)
+
+        :Return:
+        - Lucene Query
+        """
+        if isinstance(queryTree, qt.Term):
+            return self.__textQuery(QueryParser.escape(queryTree.children[0]))
+        if isinstance(queryTree, qt.Phrase):
+            return self.__textQuery('"' + QueryParser.escape(' '.join(queryTree.children)) + '"')
+
+        builder  = BooleanQuery.Builder()
+        if isinstance(queryTree, qt.Not):
+            # A negation only excludes documents, match all the others
+            builder.add(MatchAllDocsQuery(), BooleanClause.Occur.MUST)
+            builder.add(self.__treeQuery(queryTree.children[0]), BooleanClause.Occur.MUST_NOT)
+        elif isinstance(queryTree, qt.And):
+            positive = False
+            for child in queryTree.children:
+                if isinstance(child, qt.Not):
+                    builder.add(self.__treeQuery(child.children[0]), BooleanClause.Occur.MUST_NOT)
+                else:
+                    builder.add(self.__treeQuery(child), BooleanClause.Occur.MUST)
+                    positive = True
+            if not positive:
+                builder.add(MatchAllDocsQuery(), BooleanClause.Occur.MUST)
+        elif isinstance(queryTree, qt.Or):
+            for child in queryTree.children:
+                builder.add(self.__treeQuery(child), BooleanClause.Occur.SHOULD)
+        return builder.build()
+
+    def __docVectors(self, leaf, start, end):
+        """
+        Read the term counts of a range of documents of an index segment
+
+        :Parameters:
+        - `leaf`: Segment of the index (LeafReaderContext)
+        - `start`: First document of the range, in the segment (Int)
+        - `end`: End of the range, in the segment (Int)
+
+        :Return:
+        - List of (document's index ID, {stem: count}) tuples.
+        """
+        lucene.getVMEnv().attachCurrentThread()
+        reader    = leaf.reader()
+        liveDocs  = reader.getLiveDocs()
+        docCounts = []
+        for docId in range(start, end):
+            if liveDocs is not None and not liveDocs.get(docId):
+                continue
+            counts = {}
+            terms  = reader.getTermVector(docId, Indexer.STEM)
+            if terms is not None:
+                termsEnum = terms.iterator()
+                for term in BytesRefIterator.cast_(termsEnum):
+                    counts[term.utf8ToString()] = termsEnum.totalTermFreq()
+            else:
+                # Indexed without the stemmed content, stem its content again, read from this segment
+                doc     = reader.document(docId, self.__fieldSet([Indexer.CONTENT, Indexer.URL]))
+                content = doc.get(Indexer.CONTENT)
+                if content is None and self.__contentStore is not None and doc.get(Indexer.URL):
+                    content = self.__contentStore.Get(doc.get(Indexer.URL))
+                for termText in self.__stemString(content or ""):
+                    counts[termText] = counts.get(termText, 0) + 1
+            docCounts.append((leaf.docBase + docId, counts))
+
+        return docCounts
+
     @staticmethod
     def __scatterMatrix(numDocs, freqMtx):
         print("Scattering Frequency Matrix...")
@@ -225,69 +421,49 @@ class Indexer:
         return stemmedTerms
 
     @staticmethod
-    def __normalize(qVector, freqMtx):
-        for term in qVector:
-            for docId in freqMtx:
-                if (term in freqMtx[docId]) and (freqMtx[docId][term] > qVector[term]):
-                    qVector[term] = freqMtx[docId][term]
-
-    @staticmethod
-    def __dotProduct(aVector, bVector):
+    def __similarityMatrix(freqMtx):
         """
-        Calculate Dot Product
-
-        :Parameters:
-        - `aVector`: A Vector. (Dict)
-        - `bVector`: B Vector. (Dict)
-
-        :Returns:
-        - Dot Product. (Int)
+        The TermDocMatrix of a Frequency Matrix, see GetSimilarity
         """
-        dotProduct = 0
-        for term in aVector:
-            if term in bVector:
-                product     = aVector[term] * bVector[term]
-                dotProduct += product
+        if isinstance(freqMtx, TermDocMatrix):
+            return freqMtx
+        if hasattr(freqMtx, 'GetMatrix'):
+            return freqMtx.GetMatrix()
+        # Nested dictionaries by document and stem, e.g. MatrixStore.Load()
+        return TermDocMatrix.FromDict(freqMtx, byTerms=False)
 
-        return dotProduct
-
-    @staticmethod
-    def __magnitude(vector):
-        """
-        Calculate Dot Product
-
-        :Parameters:
-        - `vector`: Query Vector. (Dict)
-
-        :Returns:
-        - Vector Magnitude. (Int)
-        """
-        # Magnitude of the vector is the square root of the dot product of the vector with itself.
-        vectorMagnitude = Indexer.__dotProduct(vector, vector)
-        vectorMagnitude = math.sqrt(vectorMagnitude)
-
-        return vectorMagnitude
     ##################################################
     #Public Methods
     ##################################################
+    def IsRecreated(self):
+        """
+        Return whether the Index was older than INDEX_VERSION and has been created again,
+        empty: its documents have to be indexed again (Boolean)
+        """
+        return self.__recreated
+
     def IndexDocs(self, documents):
         """
         Index documents under the directory
 
         :Parameters:
-        - `documents`: Documents to be indexed (List)
+        - `documents`: Documents to be indexed (Iterable)
         """
         # Get the Writer Configuration
         writerConfig = IndexWriterConfig(self.__analyzer)
         # Get index writer
         writer       = IndexWriter(self.__indexDir, writerConfig)
+        docsCount    = 0
 
         for document in documents:
+            docsCount += 1
             # Create a document that would we added to the index
             doc = Document()
             # Add a field to this document
             doc.add(TextField(Indexer.NAME,      document['name'],    Field.Store.YES))
             doc.add(Field(Indexer.CONTENT,       document['content'], self.__contentType))
+            doc.add(Field(Indexer.STEM,          SnowballFilter(self.__stemAnalyzer.tokenStream(Indexer.STEM, document['content']),
+                                                                "English"), self.__stemType))
             doc.add(StringField(Indexer.DATE,    document['date'],    Field.Store.YES))
             doc.add(StringField(Indexer.URL,     document['url'],     Field.Store.YES))
             doc.add(TextField(Indexer.TAGS,      self.__qualifyTags(document['tags']), Field.Store.YES))
@@ -301,14 +477,19 @@ class Indexer:
             else:
                 # Existing index (an old copy of this document may have been indexed) so
                 # we use updateDocument instead to replace the old one matching the exact
-                # path, if present:
+                # url (untokenized), if present:
                 if self.__verbose:
                     print("Updating " + document['name'])
-                writer.updateDocument(Term(Indexer.NAME, document['name']), doc)
+                writer.updateDocument(Term(Indexer.URL, document['url']), doc)
 
         # Print index information and close writer
-        print("Indexed %d documents (%d docs in index)" % (len(documents), writer.numDocs()))
+        print("Indexed %d documents (%d docs in index)" % (docsCount, writer.numDocs()))
         writer.close()
+        # The next documents may already be in the index
+        self.__boAppend = True
+        # The next searches see the new documents
+        if self.__searcherManager is not None:
+            self.__searcherManager.maybeRefresh()
 
     def Search(self, query, field=NAME, maxResult=1000):
         """
@@ -319,20 +500,52 @@ class Indexer:
         - `field`: Field to be consulted by the query (NAME, CONTENT, DATE, URL, TAGS).
         - `maxResult`: Maximum number of results.
         """
-        # Get the Index Directory
-        reader      = DirectoryReader.open(self.__indexDir)
-        searcher    = IndexSearcher(reader)
-        # Create a query
-        queryParser = QueryParser(field, self.__analyzer).parse(query)
-        # Do a search
-        hits        = searcher.search(queryParser, maxResult)
-        print("Found %d document(s) that matched query '%s':" % (hits.totalHits, queryParser))
-        for hit in hits.scoreDocs:
-            doc = searcher.doc(hit.doc)
-            print("Document Nº: %d - Score: %.5f" % (hit.doc, hit.score))
-            print("Name: " + doc.get('name'))
-            print("Tags: " + doc.get('tags') + "\n")
-        reader.close()
+        searcher    = self.__acquire()
+        try:
+            # Create a query
+            queryParser = QueryParser(field, self.__analyzer).parse(query)
+            # Do a search
+            hits        = searcher.search(queryParser, maxResult)
+            print("Found %d document(s) that matched query '%s':" % (hits.totalHits, queryParser))
+            for hit in hits.scoreDocs:
+                doc = searcher.doc(hit.doc, self.__fieldSet([Indexer.NAME, Indexer.TAGS]))
+                print("Document Nº: %d - Score: %.5f" % (hit.doc, hit.score))
+                print("Name: " + doc.get('name'))
+                print("Tags: " + doc.get('tags') + "\n")
+        finally:
+            self.__release(searcher)
+
+    def SearchTree(self, queryTree, fromDate=None, toDate=None, maxResult=10000):
+        """
+        Evaluate a compiled user query against the archived documents of the Index
+
+        :Parameters:
+        - `queryTree`: Compiled user query, e.g. TheGuardianExtractor.getQueryTree() (QueryNode).
+        - `fromDate`: Only documents published after this date (Str), None for no limit.
+        - `toDate`: Only documents published up to this date (Str), None for no limit.
+        - `maxResult`: Maximum number of results.
+
+        :Returns:
+        - List of documents (Dict), with the fields of the archived documents.
+        """
+        builder = BooleanQuery.Builder()
+        builder.add(self.__treeQuery(queryTree), BooleanClause.Occur.MUST)
+        if fromDate or toDate:
+            lower = self.__getTimestamp(fromDate) + 1 if fromDate else 0
+            upper = self.__getTimestamp(toDate)       if toDate   else 99991231235959
+            builder.add(LongPoint.newRangeQuery(Indexer.TIMESTAMP, lower, upper), BooleanClause.Occur.FILTER)
+
+        searcher  = self.__acquire()
+        try:
+            hits      = searcher.search(builder.build(), maxResult)
+            documents = self.__loadFields(searcher, [hit.doc for hit in hits.scoreDocs],
+                                          [Indexer.NAME, Indexer.URL, Indexer.DATE, Indexer.TAGS, Indexer.CONTENT])
+        finally:
+            self.__release(searcher)
+        for document in documents:
+            document[Indexer.TAGS] = document[Indexer.TAGS].split('|') if document[Indexer.TAGS] else []
+
+        return documents
 
     def StemDocument(self, docIdx):
         """
@@ -341,54 +554,72 @@ class Indexer:
         :Parameters:
         - `docIdx`: Document's index ID (Int).
         """
-        reader       = DirectoryReader.open(self.__indexDir)
-        doc          = reader.document(docIdx).get(Indexer.CONTENT)
-        reader.close()
+        return self.__stemString(self.GetDocField(docIdx))
+
+    def IterDocCounts(self, workers=None):
+        """
+        Stream the stem counts of the indexed documents
+
+        The counts are read from the term vectors of the stemmed content, the
+        segments of the index are read in parallel.
+
+        :Parameters:
+        - `workers`: Segments read at once, the number of CPUs by default. (Int)
+
+        :Returns:
+        - Generator of (document's index ID, {stem: count}) tuples.
+        """
+        searcher = self.__acquire()
+        try:
+            reader = searcher.getIndexReader()
+            pB     = ProgressBar(reader.numDocs(), prefix='Progress:')
+            # Split every segment in chunks of documents
+            tasks  = []
+            for leaf in reader.leaves():
+                leaf = LeafReaderContext.cast_(leaf)
+                for start in range(0, leaf.reader().maxDoc(), VECTOR_CHUNK):
+                    tasks.append((leaf, start, min(start + VECTOR_CHUNK, leaf.reader().maxDoc())))
+            with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+                for docCounts in executor.map(lambda task: self.__docVectors(*task), tasks):
+                    for docIdx, counts in docCounts:
+                        yield docIdx, counts
+                        pB.updateProgress()
+        finally:
+            # Release the IndexSearcher
+            self.__release(searcher)
+
+    def SparseFreqMatrix(self, minDf=1, maxDf=1.0, topK=None, workers=None):
+        """
+        Generates the Frequency Matrix of the current Index as a sparse matrix
 
-        return self.__stemString(doc)
+        :Parameters:
+        - `minDf`: Minimum documents of a stem, number (Int) or fraction (Float).
+        - `maxDf`: Maximum documents of a stem, number (Int) or fraction (Float).
+        - `topK`: Keep only the `topK` stems found in most documents (Int).
+        - `workers`: Segments read at once, the number of CPUs by default. (Int)
 
-    def FreqMatrix(self, scattered=False, byTerms=True, saveMtx=False):
+        :Returns:
+        - TermDocMatrix
+        """
+        print("Generating Frequency Matrix...")
+        return TermDocMatrix.FromCounts(self.IterDocCounts(workers), minDf, maxDf, topK)
+
+    def FreqMatrix(self, scattered=False, byTerms=True, saveMtx=False, workers=None):
         """
         Generates a Frequency Matrix of the current Index
 
         :Parameters:
+        - `scattered`: Return the matrix as a table, see __scatterMatrix. (Boolean)
+        - `byTerms`: Weights by stem and document, or by document and stem. (Boolean)
         - `saveMtx`: Save the Frequency Matrix to a .txt file. (Boolean)
+        - `workers`: Segments read at once, the number of CPUs by default. (Int)
+
+        :Returns:
+        - Read-only nested dictionaries over the sparse matrix, see SparseFreqMatrix.
         """
-        freqMtx   = {} # Terms - DocumentID Matrix
-        reader    = DirectoryReader.open(self.__indexDir)
-        numDocs   = reader.numDocs()
-        print("Generating Frequency Matrix...")
-        pB = ProgressBar(numDocs - 1, prefix='Progress:')
-        for docIdx in range(numDocs):
-            termItr  = self.StemDocument(docIdx)
-            termSize = len(termItr)
-            docStr   = '{0}'.format(docIdx)
-            termDict = {}
-            for termText in termItr:
-                if byTerms:
-                    # Check if the term exists
-                    if termText in freqMtx:
-                        # Check if the document exists
-                        if docStr in freqMtx[termText]:
-                            termCount = int(math.ceil(((freqMtx[termText][docStr] * termSize) / 100)))
-                            freqMtx[termText].update({ docStr : ((termCount + 1) / termSize) * 100 })
-                        else:
-                            freqMtx[termText].update({ docStr : (1 / termSize) * 100 })
-                    else:
-                        termIdx = { termText : { docStr : (1 / termSize) * 100 } }
-                        freqMtx.update(termIdx)
-                else:
-                    # Check if the term exists
-                    termText = termText.replace('.', '_')
-                    if termText in termDict:
-                        termCount          = int(math.ceil((termDict[termText] * termSize) / 100))
-                        termDict[termText] = ((termCount + 1) / termSize) * 100
-                    else:
-                        termIdx = { termText : (1 / termSize) * 100 }
-                        termDict.update(termIdx)
-            if not byTerms:
-                freqMtx.update({docStr : termDict})
-            pB.updateProgress()
+        matrix  = self.SparseFreqMatrix(workers=workers)
+        freqMtx = matrix.AsDict(byTerms)
+        numDocs = int(matrix.GetDocs().max()) + 1 if len(matrix.GetDocs()) else 0
 
         if saveMtx and byTerms:
             self.__saveMatrix(numDocs, freqMtx)
@@ -396,31 +627,38 @@ class Indexer:
         if scattered and byTerms:
             freqMtx = self.__scatterMatrix(numDocs, freqMtx)
 
-        # Close IndexReader
-        reader.close()
-
         return freqMtx
 
-    def GetSimilarity(self, query, freqMtx):
+    def GetSimilarity(self, query, freqMtx, topK=None):
         """
-        Cosine Similarity
+        Cosine Similarity of a query with every document
+
+        :Parameters:
+        - `query`: Free text (Str).
+        - `freqMtx`: SparseFreqMatrix, FreqMatrix or nested dictionaries by document and stem.
+        - `topK`: Number of documents returned, all of them by default (Int).
+
+        :Returns:
+        - List of (document's index ID, similarity) tuples, from the most similar.
         """
-        qVector = { }
-        qList   = self.__stemString(query)
-        for stem in qList:
-            qVector.update({ stem : 0 })
-        self.__normalize(qVector, freqMtx)
+        docIds, scores = self.__similarityMatrix(freqMtx).Similarity(self.__stemString(query), topK)
+        return [(str(docIdx), float(score)) for docIdx, score in zip(docIds, scores)]
 
-        qList = []
-        #Get similarity between query and doc[n]
-        for docIdx, dVector in freqMtx.items():
-            dP = self.__dotProduct(qVector, dVector)
-            qM = self.__magnitude(qVector)
-            dM = self.__magnitude(dVector)
-            cosSimilarity = dP / (qM * dM)
-            qList.append((docIdx, cosSimilarity))
+    def GetSimilarities(self, queries, freqMtx, topK=None):
+        """
+        Cosine Similarity of several queries with every document, scored at once
 
-        return sorted(qList, key=lambda similarity: similarity[1], reverse=True)
+        :Parameters:
+        - `queries`: Free texts (List).
+        - `freqMtx`: SparseFreqMatrix, FreqMatrix or nested dictionaries by document and stem.
+        - `topK`: Number of documents returned by query, all of them by default (Int).
+
+        :Returns:
+        - List of similarities of each query, see GetSimilarity.
+        """
+        matrix = self.__similarityMatrix(freqMtx)
+        ranks  = matrix.BatchSimilarity([self.__stemString(query) for query in queries], topK)
+        return [[(str(docIdx), float(score)) for docIdx, score in zip(docIds, scores)] for docIds, scores in ranks]
 
     def AnalyzeDocument(self, docIdx):
         """
@@ -431,14 +669,12 @@ class Indexer:
         """
         gpeList    = {}
         geolocator = Geocode()
-        reader     = DirectoryReader.open(self.__indexDir)
-        doc        = reader.document(docIdx)
         # Load NLTK Data
         nltkPath = os.path.dirname(os.path.realpath(__file__)) + '/../tools/nltk_data'
         nltk.data.path.append(nltkPath)
 
         # Named Entity Recognition
-        content   = doc.get(Indexer.CONTENT)
+        content   = self.GetDocField(docIdx)
         sentences = nltk.sent_tokenize(content)
 
         #ProgressBar
@@ -473,12 +709,25 @@ class Indexer:
         :Returns:
         - Document's field. (Str)
         """
-        reader    = DirectoryReader.open(self.__indexDir)
-        doc       = reader.document(docIdx)
-        content   = doc.get(field)
-        reader.close()
+        return self.GetDocFields([docIdx], [field])[0][field]
 
-        return content
+    def GetDocFields(self, docIds, fields=None):
+        """
+        Get several fields of several documents at once, only the requested fields are loaded
+
+        :Parameters:
+        - `docIds`: Documents' index IDs (List).
+        - `fields`: Fields to retrieve (List), all of them by default.
+
+        :Returns:
+        - List of fields by name (Dict), in the order of docIds.
+        """
+        fields   = fields or [Indexer.NAME, Indexer.CONTENT, Indexer.DATE, Indexer.URL, Indexer.TAGS]
+        searcher = self.__acquire()
+        try:
+            return self.__loadFields(searcher, docIds, fields)
+        finally:
+            self.__release(searcher)
 
 ###################################################################################################
 #TEST
@@ -488,23 +737,14 @@ def saveFreqMatrixByTerms():
     Save the Frequency Matrix Terms vs Docs
     """
     freqMatrix = documentIndexer.FreqMatrix()
-    matrixDB   = DBHandler('TermsDB')
-    for value in sorted(freqMatrix):
-        doc = { 'stem' : value,
-                'docs' : freqMatrix[value] }
-        matrixDB.Insert(doc)
-    del matrixDB
+    MatrixStore('TermsDB', 'stem', docColumns=True).Save(freqMatrix)
 
 def saveFreqMatrixByDocs():
     """
     Save the Frequency Matrix Docs vs Terms
     """
     freqMatrix = documentIndexer.FreqMatrix(byTerms=False)
-    matrixDB   = DBHandler('DocsDB')
-    for value in freqMatrix:
-        doc = { 'doc'   : int(value),
-                'stems' : freqMatrix[value] }
-        matrixDB.Insert(doc)
+    MatrixStore('DocsDB', 'doc', docColumns=False).Save({int(docIdx): stems for docIdx, stems in freqMatrix.items()})
 
 def showCities(docID):
     """
@@ -543,7 +783,7 @@ if __name__ == "__main__":
 
     documentIndexer = Indexer(verbose=True)
     #freqMatrix      = documentIndexer.FreqMatrix(byTerms=False)
-    #List            = documentIndexer.GetSimilarity("heavy storms", freqMatrix)
+    #List            = documentIndexer.GetSimilarity("heavy storms", freqMatrix, topK=10)
     #features = documentIndexer.AnalyzeDocument(0)
     documentIndexer.GetDocField(0, "date")
 ###################################################################################################
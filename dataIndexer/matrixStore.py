@@ -0,0 +1,160 @@
+"""
+Matrix Store module
+
+Persists the Frequency Matrices of the Indexer as compact postings: one record
+per stem (TermsDB) or per document (DocsDB), holding its ids and its weights as
+packed arrays.
+"""
+###################################################################################################
+#IMPORTS
+###################################################################################################
+import sys
+from   array import array
+
+from dataDB.dbHandler import DBHandler
+
+###################################################################################################
+#CONSTANTS
+###################################################################################################
+ID_TYPE     = 'I' # Unsigned 32 bits document ids
+WEIGHT_TYPE = 'f' # 32 bits float weights
+
+###################################################################################################
+#CLASS
+###################################################################################################
+class MatrixStore:
+    """
+    Matrix Store Class
+    """
+
+    def __init__(self, dbName, keyName, docColumns=None):
+        """
+        :Parameters:
+        - `dbName`: Database's name, e.g. 'TermsDB' or 'DocsDB' (Str)
+        - `keyName`: Field of the row key, e.g. 'stem' or 'doc' (Str), indexed as unique.
+        - `docColumns`: The columns are document ids, packed, else stems (Boolean).
+                        By default, only the rows keyed by 'doc' hold stems.
+        """
+        self.__keyName    = keyName
+        self.__docColumns = keyName != 'doc' if docColumns is None else docColumns
+        self.__matrixDB   = DBHandler(dbName, uniqueKey=keyName)
+
+    ##################################################
+    #Private Methods
+    ##################################################
+    @staticmethod
+    def __pack(typeCode, values):
+        """
+        Packs a list of numbers, always little-endian
+        """
+        packed = array(typeCode, values)
+        if sys.byteorder != 'little':
+            packed.byteswap()
+        return packed.tobytes()
+
+    @staticmethod
+    def __unpack(typeCode, data):
+        """
+        Unpacks a list of numbers packed by __pack
+        """
+        unpacked = array(typeCode)
+        unpacked.frombytes(data)
+        if sys.byteorder != 'little':
+            unpacked.byteswap()
+        return unpacked
+
+    def __record(self, key, vector):
+        """
+        Creates the record of a matrix row
+
+        :Parameters:
+        - `key`: Row key, a stem or a document id.
+        - `vector`: Weights of the row by column id (Dict), e.g. {'0': 1.25, '12': 0.3}
+
+        :Returns:
+        - Record (Dict): document ids are packed in 'ids', stems are kept as a
+          list of strings in 'terms'.
+        """
+        if self.__docColumns:
+            columns = sorted(vector, key=int)
+        else:
+            columns = sorted(vector)
+        record  = {self.__keyName: key, 'size': len(columns),
+                   'weights': self.__pack(WEIGHT_TYPE, [vector[column] for column in columns])}
+        if self.__docColumns:
+            record['ids']   = self.__pack(ID_TYPE, [int(column) for column in columns])
+        else:
+            record['terms'] = columns
+
+        return record
+
+    def __vector(self, record):
+        """
+        Converts a record to the weights of the row by column id (Dict)
+        """
+        weights = self.__unpack(WEIGHT_TYPE, record['weights'])
+        if 'ids' in record:
+            columns = [str(column) for column in self.__unpack(ID_TYPE, record['ids'])]
+        else:
+            columns = record['terms']
+
+        return dict(zip(columns, weights))
+
+    ##################################################
+    #Public Methods
+    ##################################################
+    def Save(self, freqMtx, chunkSize=1000):
+        """
+        Store a Frequency Matrix, replacing the stored rows with the same key
+
+        :Parameters:
+        - `freqMtx`: Frequency Matrix, weights by row key and column id (Dict)
+        - `chunkSize`: Rows written at once (Int)
+        """
+        chunk = []
+        for key in freqMtx:
+            chunk.append(self.__record(key, freqMtx[key]))
+            if len(chunk) >= chunkSize:
+                self.__matrixDB.Insert(chunk)
+                chunk = []
+        if chunk:
+            self.__matrixDB.Insert(chunk)
+
+    def GetVector(self, key):
+        """
+        Read a single row of the stored matrix
+
+        :Parameters:
+        - `key`: Row key, a stem or a document id.
+
+        :Returns:
+        - Weights of the row by column id (Dict), empty if the row is not stored.
+        """
+        record = self.__matrixDB.FindOne({self.__keyName: key})
+
+        return self.__vector(record) if record else {}
+
+    def IterVectors(self, batchSize=500):
+        """
+        Stream the rows of the stored matrix
+
+        :Returns:
+        - Generator of (key, weights by column id) tuples
+        """
+        for record in self.__matrixDB.IterDocuments(batchSize=batchSize):
+            yield record[self.__keyName], self.__vector(record)
+
+    def Load(self):
+        """
+        Read the whole stored matrix
+
+        :Returns:
+        - Frequency Matrix, weights by row key and column id (Dict)
+        """
+        return dict(self.IterVectors())
+
+    def Empty(self):
+        """
+        Remove the stored matrix
+        """
+        self.__matrixDB.Empty()
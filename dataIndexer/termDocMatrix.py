@@ -0,0 +1,495 @@
+"""
+Term-Document Matrix module
+
+Sparse Frequency Matrix of the Indexer: the sorted stem vocabulary, the
+document ids and the weights in Compressed Sparse Row arrays (one row per
+stem), with a column (document) copy built on demand. AsDict() reads it as
+the nested dictionaries returned by Indexer.FreqMatrix.
+"""
+###################################################################################################
+#IMPORTS
+###################################################################################################
+import math
+from   array           import array
+from   collections.abc import Mapping
+
+import numpy as np
+
+###################################################################################################
+#CONSTANTS
+###################################################################################################
+ID_TYPE     = np.int32   # Row and column positions
+WEIGHT_TYPE = np.float32 # Weights
+BLOCK_SIZE  = 1 << 22    # Scores of each block of queries of BatchSimilarity
+
+###################################################################################################
+#CLASS
+###################################################################################################
+class _VectorView(Mapping):
+    """
+    Read-only dictionary of a row or a column, the labels are found by binary search
+    """
+    __slots__ = ('__positions', '__values', '__labels', '__index')
+
+    def __init__(self, positions, values, labels, index):
+        """
+        :Parameters:
+        - `positions`: Sorted positions of the non-zero weights (Array)
+        - `values`: Weights (Array)
+        - `labels`: Label of each position, a stem or a document id string (Array)
+        - `index`: Position of each label (Dict)
+        """
+        self.__positions = positions
+        self.__values    = values
+        self.__labels    = labels
+        self.__index     = index
+
+    def __getitem__(self, label):
+        position = self.__index.get(label)
+        if position is not None:
+            idx = np.searchsorted(self.__positions, position)
+            if idx < len(self.__positions) and self.__positions[idx] == position:
+                return float(self.__values[idx])
+        raise KeyError(label)
+
+    def __iter__(self):
+        return iter(self.__labels[self.__positions])
+
+    def __len__(self):
+        return len(self.__positions)
+
+    def items(self):
+        return zip(self.__labels[self.__positions], self.__values.tolist())
+
+class _MatrixView(Mapping):
+    """
+    Read-only dictionary of the rows (by stem) or of the columns (by document id string)
+    """
+
+    def __init__(self, matrix, byTerms):
+        """
+        :Parameters:
+        - `matrix`: Viewed matrix (TermDocMatrix)
+        - `byTerms`: Rows by stem, else columns by document (Boolean)
+        """
+        self.__matrix     = matrix
+        self.__byTerms    = byTerms
+        self.__terms      = matrix.GetTerms()
+        self.__termIndex  = matrix.GetTermIndex()
+        self.__docLabels  = np.array([str(docIdx) for docIdx in matrix.GetDocs()], dtype=object)
+        self.__docIndex   = {label: position for position, label in enumerate(self.__docLabels)}
+        if byTerms:
+            self.__indptr, self.__indices, self.__data = matrix.GetCSR()
+        else:
+            self.__indptr, self.__indices, self.__data = matrix.GetCSC()
+
+    def __getitem__(self, key):
+        if self.__byTerms:
+            position, labels, index = self.__termIndex.get(key), self.__docLabels, self.__docIndex
+        else:
+            position, labels, index = self.__docIndex.get(key), self.__terms, self.__termIndex
+        if position is None:
+            raise KeyError(key)
+        start, end = self.__indptr[position], self.__indptr[position + 1]
+        return _VectorView(self.__indices[start:end], self.__data[start:end], labels, index)
+
+    def __iter__(self):
+        return iter(self.__terms if self.__byTerms else self.__docLabels)
+
+    def __len__(self):
+        return len(self.__terms if self.__byTerms else self.__docLabels)
+
+    def GetMatrix(self):
+        """
+        Return the viewed matrix (TermDocMatrix)
+        """
+        return self.__matrix
+
+class TermDocMatrix:
+    """
+    Term-Document Matrix Class
+    """
+
+    def __init__(self, terms, docs, indptr, indices, data):
+        """
+        :Parameters:
+        - `terms`: Sorted stems of the rows (Array)
+        - `docs`: Document index IDs of the columns (Array)
+        - `indptr`: Start of each row in indices and data, and their end (Array)
+        - `indices`: Column of each weight, sorted in each row (Array)
+        - `data`: Weights (Array)
+        """
+        self.__terms     = terms
+        self.__docs      = docs
+        self.__indptr    = indptr
+        self.__indices   = indices
+        self.__data      = data
+        self.__termIndex = None
+        self.__docIndex  = None
+        self.__csc       = None
+        self.__unitData  = None
+        self.__rowMax    = None
+
+    ##################################################
+    #Private Methods
+    ##################################################
+    @staticmethod
+    def __prune(df, numDocs, minDf, maxDf, topK):
+        """
+        Select the vocabulary by document frequency
+
+        :Parameters:
+        - `df`: Documents of each stem (Array)
+        - `numDocs`: Number of documents (Int)
+        - `minDf`, `maxDf`: Bounds of the document frequency, a number of documents (Int)
+                            or a fraction of them (Float)
+        - `topK`: Keep only the most frequent stems (Int)
+
+        :Returns:
+        - Kept stems (Boolean Array)
+        """
+        minCount = minDf if isinstance(minDf, int) else math.ceil(minDf * numDocs)
+        maxCount = maxDf if isinstance(maxDf, int) else math.floor(maxDf * numDocs)
+        keep     = (df >= minCount) & (df <= maxCount)
+        if topK is not None and np.count_nonzero(keep) > topK:
+            candidates = np.flatnonzero(keep)
+            keep       = np.zeros(len(df), dtype=bool)
+            keep[candidates[np.argsort(-df[candidates], kind='stable')[:topK]]] = True
+        return keep
+
+    @classmethod
+    def __build(cls, terms, docs, rows, columns, weights, minDf=1, maxDf=1.0, topK=None):
+        """
+        Creates a matrix of its (row, column, weight) triplets
+
+        :Parameters:
+        - `terms`: Stem of each row id (List)
+        - `docs`: Document index ID of each column id (List)
+        - `rows`, `columns`, `weights`: Triplets of the non-zero weights (Array)
+        """
+        terms   = np.array(terms, dtype=object)
+        rows    = np.frombuffer(rows, dtype=ID_TYPE)
+        columns = np.frombuffer(columns, dtype=ID_TYPE)
+        weights = np.frombuffer(weights, dtype=WEIGHT_TYPE)
+
+        # Documents, sorted
+        docs    = np.array(docs, dtype=np.int64)
+        colIds  = np.empty(len(docs), dtype=ID_TYPE)
+        colIds[np.argsort(docs, kind='stable')] = np.arange(len(docs), dtype=ID_TYPE)
+        columns = colIds[columns]
+
+        # Vocabulary, sorted
+        kept    = np.flatnonzero(cls.__prune(np.bincount(rows, minlength=len(terms)), len(docs), minDf, maxDf, topK))
+        kept    = kept[np.argsort(terms[kept], kind='stable')]
+        rowIds  = np.full(len(terms), -1, dtype=ID_TYPE)
+        rowIds[kept] = np.arange(len(kept), dtype=ID_TYPE)
+
+        # Sort the kept weights by row and column
+        mask    = rowIds[rows] >= 0
+        rows    = rowIds[rows[mask]]
+        columns = columns[mask]
+        order   = np.lexsort((columns, rows))
+        indptr  = np.zeros(len(kept) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(kept)), out=indptr[1:])
+
+        return cls(terms[kept], np.sort(docs), indptr, columns[order], weights[mask][order])
+
+    def __cosineData(self):
+        """
+        Weights of the L2 normalized documents, and the maximum weight of each stem, computed once
+        """
+        if self.__unitData is None:
+            norms = np.sqrt(np.bincount(self.__indices, weights=np.square(self.__data, dtype=np.float64),
+                                        minlength=len(self.__docs)))
+            norms[norms == 0] = 1
+            self.__unitData = (self.__data / norms[self.__indices]).astype(WEIGHT_TYPE)
+            self.__rowMax   = np.zeros(len(self.__terms), dtype=WEIGHT_TYPE)
+            filled          = np.flatnonzero(np.diff(self.__indptr))
+            if len(filled):
+                self.__rowMax[filled] = np.maximum.reduceat(self.__data, self.__indptr[filled])
+        return self.__unitData, self.__rowMax
+
+    def __queryVector(self, terms):
+        """
+        Vector of a query: each stem in the vocabulary weighs its maximum weight in the documents
+
+        :Parameters:
+        - `terms`: Stems of the query (Iterable)
+
+        :Returns:
+        - Rows and L2 normalized weights of the query's stems (Arrays)
+        """
+        termIndex = self.GetTermIndex()
+        rows      = np.array(sorted({termIndex[termText] for termText in terms if termText in termIndex}),
+                             dtype=np.int64)
+        weights   = self.__cosineData()[1][rows].astype(np.float64)
+        norm      = np.sqrt(np.dot(weights, weights))
+        return rows, (weights / norm if norm else weights)
+
+    def __rowPositions(self, rows):
+        """
+        Positions in indices and data of the weights of some rows
+
+        :Returns:
+        - Positions (Array) and row lengths (Array)
+        """
+        starts    = self.__indptr[rows]
+        lengths   = self.__indptr[rows + 1] - starts
+        offsets   = np.zeros(len(rows), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum()), lengths
+
+    def __topK(self, scores, topK):
+        """
+        Rank the documents by score
+
+        :Returns:
+        - Document index IDs and scores of the `topK` best documents, or all of them (Arrays)
+        """
+        if topK is not None and topK < len(scores):
+            best = np.argpartition(-scores, topK)[:topK]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return self.__docs[best], scores[best]
+
+    ##################################################
+    #Public Methods
+    ##################################################
+    @classmethod
+    def FromCounts(cls, docCounts, minDf=1, maxDf=1.0, topK=None):
+        """
+        Creates the matrix of the stem counts of the documents
+
+        The weight of a stem is its percentage of the document's stems, as in Indexer.FreqMatrix.
+
+        :Parameters:
+        - `docCounts`: Iterable of (document's index ID, {stem: count}) tuples.
+        - `minDf`: Minimum documents of a stem, number (Int) or fraction (Float).
+        - `maxDf`: Maximum documents of a stem, number (Int) or fraction (Float).
+        - `topK`: Keep only the `topK` stems found in most documents (Int).
+        """
+        termIds = {}
+        docs    = []
+        rows, columns, weights = array('i'), array('i'), array('f')
+        for column, (docIdx, counts) in enumerate(docCounts):
+            docs.append(docIdx)
+            termSize = sum(counts.values())
+            for termText, termCount in counts.items():
+                rows.append(termIds.setdefault(termText, len(termIds)))
+                columns.append(column)
+                weights.append((termCount / termSize) * 100)
+
+        return cls.__build(list(termIds), docs, rows, columns, weights, minDf, maxDf, topK)
+
+    @classmethod
+    def FromDict(cls, freqMtx, byTerms=True):
+        """
+        Creates the matrix of a Frequency Matrix of nested dictionaries, e.g. MatrixStore.Load()
+
+        :Parameters:
+        - `freqMtx`: Weights by stem and document, or by document and stem (Dict)
+        - `byTerms`: The outer keys are the stems (Boolean)
+        """
+        termIds, docIds = {}, {}
+        rows, columns, weights = array('i'), array('i'), array('f')
+        for outer, vector in freqMtx.items():
+            for inner, weight in vector.items():
+                termText, docIdx = (outer, inner) if byTerms else (inner, outer)
+                rows.append(termIds.setdefault(termText, len(termIds)))
+                columns.append(docIds.setdefault(int(docIdx), len(docIds)))
+                weights.append(weight)
+
+        return cls.__build(list(termIds), list(docIds), rows, columns, weights)
+
+    def GetTerms(self):
+        """
+        Return the stems of the rows (Array)
+        """
+        return self.__terms
+
+    def GetDocs(self):
+        """
+        Return the document index IDs of the columns (Array)
+        """
+        return self.__docs
+
+    def GetTermIndex(self):
+        """
+        Return the row of each stem (Dict)
+        """
+        if self.__termIndex is None:
+            self.__termIndex = {termText: row for row, termText in enumerate(self.__terms)}
+        return self.__termIndex
+
+    def GetDocIndex(self):
+        """
+        Return the column of each document index ID (Dict)
+        """
+        if self.__docIndex is None:
+            self.__docIndex = {int(docIdx): column for column, docIdx in enumerate(self.__docs)}
+        return self.__docIndex
+
+    def GetCSR(self):
+        """
+        Return the rows: (indptr, column indices, weights) Arrays
+        """
+        return self.__indptr, self.__indices, self.__data
+
+    def GetCSC(self):
+        """
+        Return the columns: (indptr, row indices, weights) Arrays, built on the first call
+        """
+        if self.__csc is None:
+            rows   = np.repeat(np.arange(len(self.__terms), dtype=ID_TYPE), np.diff(self.__indptr))
+            order  = np.argsort(self.__indices, kind='stable')
+            indptr = np.zeros(len(self.__docs) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.__indices, minlength=len(self.__docs)), out=indptr[1:])
+            self.__csc = (indptr, rows[order], self.__data[order])
+        return self.__csc
+
+    def Shape(self):
+        """
+        Return the (stems, documents) dimensions of the matrix
+        """
+        return len(self.__terms), len(self.__docs)
+
+    def NNZ(self):
+        """
+        Return the number of non-zero weights
+        """
+        return len(self.__data)
+
+    def GetRow(self, termText):
+        """
+        Get the weights of a stem
+
+        :Returns:
+        - Document index IDs and weights (Arrays), empty if the stem is not in the vocabulary.
+        """
+        row = self.GetTermIndex().get(termText)
+        if row is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=WEIGHT_TYPE)
+        start, end = self.__indptr[row], self.__indptr[row + 1]
+        return self.__docs[self.__indices[start:end]], self.__data[start:end]
+
+    def GetColumn(self, docIdx):
+        """
+        Get the weights of a document
+
+        :Returns:
+        - Stems and weights (Arrays), empty if the document is not in the matrix.
+        """
+        column = self.GetDocIndex().get(int(docIdx))
+        if column is None:
+            return np.empty(0, dtype=object), np.empty(0, dtype=WEIGHT_TYPE)
+        indptr, rows, data = self.GetCSC()
+        start, end = indptr[column], indptr[column + 1]
+        return self.__terms[rows[start:end]], data[start:end]
+
+    def Rows(self, terms):
+        """
+        Slice the matrix to some stems, the ones out of the vocabulary are ignored
+
+        :Returns:
+        - TermDocMatrix with the same documents
+        """
+        termIndex = self.GetTermIndex()
+        rows      = np.array(sorted(termIndex[termText] for termText in set(terms) if termText in termIndex),
+                             dtype=np.int64)
+        positions, lengths = self.__rowPositions(rows)
+        indptr    = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+
+        return TermDocMatrix(self.__terms[rows], self.__docs, indptr,
+                             self.__indices[positions], self.__data[positions])
+
+    def Columns(self, docIds):
+        """
+        Slice the matrix to some documents, the ones not in the matrix are ignored
+
+        :Returns:
+        - TermDocMatrix with the same stems
+        """
+        docIndex = self.GetDocIndex()
+        columns  = np.array(sorted(docIndex[int(docIdx)] for docIdx in set(docIds) if int(docIdx) in docIndex),
+                            dtype=np.int64)
+        newIds   = np.full(len(self.__docs), -1, dtype=ID_TYPE)
+        newIds[columns] = np.arange(len(columns), dtype=ID_TYPE)
+        mask     = newIds[self.__indices] >= 0
+        rows     = np.repeat(np.arange(len(self.__terms)), np.diff(self.__indptr))[mask]
+        indptr   = np.zeros(len(self.__terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(self.__terms)), out=indptr[1:])
+
+        return TermDocMatrix(self.__terms, self.__docs[columns], indptr,
+                             newIds[self.__indices[mask]], self.__data[mask])
+
+    def Similarity(self, terms, topK=None):
+        """
+        Cosine Similarity of a query with every document, a sparse matrix-vector product
+
+        :Parameters:
+        - `terms`: Stems of the query (Iterable)
+        - `topK`: Number of documents returned, all of them by default (Int)
+
+        :Returns:
+        - Document index IDs and similarities, from the most similar (Arrays)
+        """
+        unitData           = self.__cosineData()[0]
+        rows, weights      = self.__queryVector(terms)
+        positions, lengths = self.__rowPositions(rows)
+        scores             = np.bincount(self.__indices[positions], weights=unitData[positions] * np.repeat(weights, lengths),
+                                         minlength=len(self.__docs))
+
+        return self.__topK(scores, topK)
+
+    def BatchSimilarity(self, queries, topK=None):
+        """
+        Cosine Similarity of several queries with every document, a sparse matrix-matrix product
+        for each block of queries
+
+        :Parameters:
+        - `queries`: Stems of each query (List)
+        - `topK`: Number of documents returned by query, all of them by default (Int)
+
+        :Returns:
+        - List of (document index IDs, similarities) Arrays, see Similarity
+        """
+        unitData = self.__cosineData()[0]
+        docSize  = max(1, len(self.__docs))
+        step     = max(1, BLOCK_SIZE // docSize)
+        results  = []
+        for start in range(0, len(queries), step):
+            vectors            = [self.__queryVector(terms) for terms in queries[start:start + step]]
+            # Nonzero (query, stem) pairs of the block, each one adds its stem's row to its query's scores
+            queryIds           = np.repeat(np.arange(len(vectors)), [len(rows) for rows, _ in vectors])
+            rows               = np.concatenate([rows for rows, _ in vectors])
+            weights            = np.concatenate([weights for _, weights in vectors])
+            positions, lengths = self.__rowPositions(rows)
+            scores             = np.bincount(np.repeat(queryIds, lengths) * docSize + self.__indices[positions],
+                                             weights=unitData[positions] * np.repeat(weights, lengths),
+                                             minlength=len(vectors) * docSize)
+            results           += [self.__topK(queryScores, topK)
+                                  for queryScores in scores.reshape(len(vectors), docSize)[:, :len(self.__docs)]]
+
+        return results
+
+    def AsDict(self, byTerms=True):
+        """
+        Read the matrix as a Frequency Matrix of nested dictionaries, without copying it
+
+        :Parameters:
+        - `byTerms`: Weights by stem and document id string, or by document id string and stem (Boolean)
+
+        :Returns:
+        - Read-only Mapping of read-only Mappings
+        """
+        return _MatrixView(self, byTerms)
+
+    def ToScipy(self):
+        """
+        Return the matrix as a scipy.sparse.csr_matrix, scipy is only needed by this method
+        """
+        from scipy.sparse import csr_matrix
+
+        return csr_matrix((self.__data, self.__indices, self.__indptr), shape=self.Shape())
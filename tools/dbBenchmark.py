@@ -0,0 +1,128 @@
+"""
+DataBase Benchmark module
+
+Compares the storage backends of the DBHandler on synthetic articles: the
+embedded SQLite database and MongoDB (skipped when no mongod is reachable).
+Usage: python -m tools.dbBenchmark --documents 20000 --batch-size 500
+"""
+###################################################################################################
+#IMPORTS
+###################################################################################################
+import os
+import time
+import tempfile
+import argparse
+
+from pymongo        import MongoClient
+from pymongo.errors import PyMongoError
+
+from dataDB                       import dbClient
+from dataDB.dbHandler             import DBHandler
+from tools.theguardian            import theguardian_server
+from dataExtractors.eDocument     import EDocument
+from dataExtractors.bodyExtractor import lxmlBody
+
+###################################################################################################
+#FUNCTIONS
+###################################################################################################
+def SyntheticDocuments(documents=10000, paragraphs=12, duplicates=0.1):
+    """
+    Archived documents built from synthetic articles
+
+    :Parameters:
+    - `documents`: Number of documents. (Int)
+    - `paragraphs`: Paragraphs of each document. (Int)
+    - `duplicates`: Fraction of the documents stored twice. (Float)
+
+    :Returns:
+    - List of documents (Dict)
+    """
+    articles = theguardian_server.synthetic_articles(documents, paragraphs)
+    archived = [EDocument(article['webTitle'], article['webUrl'], article['webPublicationDate'],
+                          [tag['sectionId'] for tag in article['tags']], lxmlBody(article['fields']['body']),
+                          'theguardian', article['id'], article['fields']['lastModified']).dictDump()
+                for article in articles]
+
+    return archived + archived[:int(len(archived) * duplicates)]
+
+def Benchmark(backend, documents, batchSize=500, uniqueKey='url', uri=None):
+    """
+    Time the DBHandler operations on a backend
+
+    :Parameters:
+    - `backend`: 'sqlite' or 'mongo'. (Str)
+    - `documents`: Documents to be stored. (List)
+    - `batchSize`: Documents of each Insert. (Int)
+    - `uniqueKey`: Unique key of the collection, None to remove the duplicates afterwards. (Str)
+    - `uri`: MongoDB connection string. (Str)
+
+    :Returns:
+    - Seconds of each operation. (Dict)
+    """
+    report = {}
+    folder = tempfile.mkdtemp()
+    dbClient.close()
+    dbClient.configure(backend=backend, uri=uri, path=os.path.join(folder, 'benchmark.db'))
+    try:
+        collection = DBHandler('BenchmarkDB', uniqueKey)
+        collection.Empty()
+
+        tStamp = time.perf_counter()
+        for idx in range(0, len(documents), batchSize):
+            # Copies, MongoDB adds the _id to the inserted documents
+            collection.Insert([dict(document) for document in documents[idx:idx + batchSize]])
+        report['insert'] = time.perf_counter() - tStamp
+
+        tStamp = time.perf_counter()
+        collection.RemoveDuplicatesBy('url')
+        report['removeDuplicates'] = time.perf_counter() - tStamp
+
+        tStamp = time.perf_counter()
+        stored = sum(1 for _ in collection.IterDocuments())
+        report['iterAll'] = time.perf_counter() - tStamp
+
+        tStamp = time.perf_counter()
+        sum(1 for _ in collection.IterDocuments(None, ['id', 'lastModified']))
+        report['iterProjected'] = time.perf_counter() - tStamp
+
+        tStamp = time.perf_counter()
+        recent = collection.GetDocuments({'date': {'$gt': documents[len(documents) // 10]['date']}}, ['url'])
+        report['filter'] = time.perf_counter() - tStamp
+
+        tStamp = time.perf_counter()
+        collection.Empty()
+        report['empty'] = time.perf_counter() - tStamp
+
+        report['stored']   = stored
+        report['filtered'] = len(recent)
+    finally:
+        dbClient.close()
+
+    return report
+
+###################################################################################################
+#MAIN
+###################################################################################################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DBHandler storage backend benchmark.")
+    parser.add_argument("--documents",  type=int,   default=10000)
+    parser.add_argument("--paragraphs", type=int,   default=12)
+    parser.add_argument("--duplicates", type=float, default=0.1)
+    parser.add_argument("--batch-size", type=int,   default=500)
+    parser.add_argument("--no-unique",  action="store_true", help="insert without unique key")
+    parser.add_argument("--uri",        default=None, help="MongoDB connection string")
+    args = parser.parse_args()
+
+    documents = SyntheticDocuments(args.documents, args.paragraphs, args.duplicates)
+    uniqueKey = None if args.no_unique else 'url'
+    for backend in dbClient.BACKENDS:
+        if backend == 'mongo':
+            try:
+                MongoClient(args.uri or dbClient.URI, serverSelectionTimeoutMS=2000).admin.command('ping')
+            except PyMongoError as error:
+                print("%-7s skipped: %s" % (backend, str(error).split(' (configured')[0]))
+                continue
+        result = Benchmark(backend, documents, args.batch_size, uniqueKey, args.uri)
+        print("%-7s insert %.3fs - duplicates %.3fs - iter %.3fs - projected %.3fs - filter %.3fs - empty %.3fs "
+              "(%d stored)" % (backend, result['insert'], result['removeDuplicates'], result['iterAll'],
+                               result['iterProjected'], result['filter'], result['empty'], result['stored']))
@@ -0,0 +1,95 @@
+"""
+Extractor Benchmark module
+
+Measures the throughput of TheGuardianExtractor against a local stand-in of
+The Guardian API, no network nor API key required.
+Usage: python -m tools.extractorBenchmark --articles 4000 --latency 0.1
+"""
+###################################################################################################
+#IMPORTS
+###################################################################################################
+import time
+import argparse
+
+from tools.rateLimiter                   import RateLimiter
+from tools.theguardian                   import theguardian_server, theguardian_session
+from dataExtractors.theGuardianExtractor import TheGuardianExtractor
+from dataExtractors.bodyExtractor        import BodyExtractor
+
+###################################################################################################
+#FUNCTIONS
+###################################################################################################
+def Benchmark(articles=2000, paragraphs=12, latency=0.05, jitter=0.0, errorRate=0.0, maxPageSize=200,
+              workers=8, shardSize=4000, processes=None, query="storm | rain | flood"):
+    """
+    Run getContent against a local stand-in server
+
+    :Parameters:
+    - `articles`: Synthetic articles served. (Int)
+    - `paragraphs`: Paragraphs of each article body. (Int)
+    - `latency`: Seconds added to every response. (Float)
+    - `jitter`: Random seconds added on top of the latency. (Float)
+    - `errorRate`: Fraction of the requests answered with 429 or 500. (Float)
+    - `maxPageSize`: Largest page size served. (Int)
+    - `workers`: Pages requested concurrently by the extractor. (Int)
+    - `shardSize`: Date window size of the extractor. (Int)
+    - `processes`: Body extraction processes, 0 extracts in the main thread. (Int)
+    - `query`: Query of the extractor. (Str)
+
+    :Returns:
+    - Report with the articles, bytes, requests, seconds and throughputs. (Dict)
+    """
+    fixtures   = theguardian_server.synthetic_articles(articles, paragraphs)
+    prvHost    = theguardian_session.API_HOST
+    prvCache   = theguardian_session.get_cache()
+    prvLimiter = theguardian_session.get_limiter()
+    try:
+        with theguardian_server.StandInServer(fixtures, latency=latency, jitter=jitter, error_rate=errorRate,
+                                              max_page_size=maxPageSize, retry_after=0.1) as standIn:
+            # Measure the extractor only: no cache and no client side throttling
+            theguardian_session.set_host(standIn.url)
+            theguardian_session.set_cache(None)
+            theguardian_session.set_limiter(RateLimiter(maxRate=10000))
+
+            bodyStage = BodyExtractor(processes=processes)
+            extractor = TheGuardianExtractor(query, workers=workers, shardSize=shardSize, bodyExtractor=bodyStage)
+            tStamp    = time.perf_counter()
+            documents = extractor.getContent()
+            elapsed   = time.perf_counter() - tStamp
+            bodyStage.close()
+
+            report = {'articles'         : len(documents),
+                      'bytes'            : standIn.bytes_sent,
+                      'requests'         : standIn.requests,
+                      'seconds'          : elapsed,
+                      'articlesPerSecond': len(documents) / elapsed,
+                      'bytesPerSecond'   : standIn.bytes_sent / elapsed}
+    finally:
+        theguardian_session.set_host(prvHost)
+        theguardian_session.set_cache(prvCache)
+        theguardian_session.set_limiter(prvLimiter)
+
+    return report
+
+###################################################################################################
+#MAIN
+###################################################################################################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TheGuardianExtractor throughput benchmark.")
+    parser.add_argument("--articles",      type=int,   default=2000)
+    parser.add_argument("--paragraphs",    type=int,   default=12)
+    parser.add_argument("--latency",       type=float, default=0.05)
+    parser.add_argument("--jitter",        type=float, default=0.0)
+    parser.add_argument("--error-rate",    type=float, default=0.0)
+    parser.add_argument("--max-page-size", type=int,   default=200)
+    parser.add_argument("--workers",       type=int,   default=8)
+    parser.add_argument("--shard-size",    type=int,   default=4000)
+    parser.add_argument("--processes",     type=int,   default=None)
+    args = parser.parse_args()
+
+    result = Benchmark(articles=args.articles, paragraphs=args.paragraphs, latency=args.latency, jitter=args.jitter,
+                       errorRate=args.error_rate, maxPageSize=args.max_page_size, workers=args.workers,
+                       shardSize=args.shard_size, processes=args.processes)
+    print()
+    print("Articles:  %d in %.3fs (%d requests)" % (result['articles'], result['seconds'], result['requests']))
+    print("Throughput: %.1f articles/s - %.1f KB/s" % (result['articlesPerSecond'], result['bytesPerSecond'] / 1024))
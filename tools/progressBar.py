@@ -29,7 +29,7 @@ class ProgressBar:
         - `fill` (optional): Bar fill character (Str)
         """
         self.__total     = total
-        self.__tStamp    = time.clock() #Start time (Int)
+        self.__tStamp    = time.perf_counter() #Start time (Int)
         self.__prefix    = prefix
         self.__decimals  = decimals
         self.__length    = length
@@ -50,7 +50,7 @@ class ProgressBar:
             percent = ("{0:." + str(self.__decimals) + "f}").format(100 * (self.__iteration / float(self.__total)))
             filledLength = int(self.__length * self.__iteration // self.__total)
             progress = self.__fill * filledLength + '-' * (self.__length - filledLength)
-            timeStamp = time.clock() - self.__tStamp
+            timeStamp = time.perf_counter() - self.__tStamp
             print('\r%s |%s| %s%% - %.3fs - %d of %d' % (self.__prefix, progress, percent, timeStamp, self.__iteration, self.__total), end = '\r')
         # Print New Line on Complete
         elif self.__iteration == self.__total:
@@ -0,0 +1,112 @@
+"""
+Rate Limiter module
+"""
+###################################################################################################
+#IMPORTS
+###################################################################################################
+import time
+import random
+import threading
+
+###################################################################################################
+#CONSTANTS
+###################################################################################################
+
+###################################################################################################
+#CLASS
+###################################################################################################
+class RateLimiter:
+    """
+    Adaptive Token Bucket Rate Limiter Class
+
+    Shared by threads, the rate is halved every time the server throttles the
+    requests and grows back linearly with every successful request.
+    """
+
+    def __init__(self, maxRate=12.0, burst=None, minRate=0.5, increase=None):
+        """
+        :Parameters:
+        - `maxRate`: Maximum requests per second. (Float)
+        - `burst` (optional): Requests that can be sent at once, defaults to maxRate. (Int)
+        - `minRate` (optional): Rate floor after throttling. (Float)
+        - `increase` (optional): Rate recovered per successful request, defaults to maxRate / 50. (Float)
+        """
+        self.__lock     = threading.Lock()
+        self.__maxRate  = float(maxRate)
+        self.__minRate  = min(float(minRate), self.__maxRate)
+        self.__rate     = self.__maxRate
+        self.__burst    = float(burst) if burst else max(1.0, self.__maxRate)
+        self.__increase = increase if increase else self.__maxRate / 50
+        self.__tokens   = self.__burst
+        self.__tStamp   = time.monotonic()
+        self.__resume   = 0.0
+
+    def __refill(self, now):
+        """
+        Add the tokens earned since the last refill (lock held)
+        """
+        self.__tokens = min(self.__burst, self.__tokens + (now - self.__tStamp) * self.__rate)
+        self.__tStamp = now
+
+    def acquire(self):
+        """
+        Block until a request can be sent
+        """
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                self.__refill(now)
+                if now >= self.__resume and self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return
+                wait = max(self.__resume - now, (1 - self.__tokens) / self.__rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Hold every request for a while (e.g. Retry-After or exhausted quota)
+
+        :Parameters:
+        - `seconds`: Time to wait. (Float)
+        """
+        with self.__lock:
+            self.__resume = max(self.__resume, time.monotonic() + seconds)
+
+    def throttled(self):
+        """
+        Multiplicative decrease of the rate, the server refused a request
+        """
+        with self.__lock:
+            self.__refill(time.monotonic())
+            self.__rate   = max(self.__minRate, self.__rate / 2)
+            self.__tokens = min(self.__tokens, 0.0)
+
+    def succeeded(self):
+        """
+        Additive increase of the rate, the server accepted a request
+        """
+        with self.__lock:
+            self.__refill(time.monotonic())
+            self.__rate = min(self.__maxRate, self.__rate + self.__increase)
+
+    @staticmethod
+    def backoff(attempt, base=0.5, cap=30.0):
+        """
+        Exponential backoff with jitter
+
+        :Parameters:
+        - `attempt`: Number of failed attempts. (Int)
+        - `base` (optional): Delay of the first retry in seconds. (Float)
+        - `cap` (optional): Maximum delay in seconds. (Float)
+
+        :Returns:
+        - Seconds to wait before the next attempt. (Float)
+        """
+        delay = min(cap, base * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    def getRate(self):
+        """
+        Return the current rate in requests per second
+        """
+        return self.__rate
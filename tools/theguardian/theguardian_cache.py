@@ -0,0 +1,175 @@
+"""
+The cache module keeps the bodies of the API responses
+on disk, addressed by their normalized request parameters,
+so repeated requests can be answered without the network.
+"""
+import os
+import json
+import time
+import zlib
+import hashlib
+import threading
+
+
+class CacheMissError(LookupError):
+
+    """
+    Raised in offline mode when a request has not been cached.
+    """
+
+
+class ResponseCache:
+
+    def __init__(self, path=None, ttl=7 * 24 * 60 * 60, max_size=512 * 1024 * 1024, offline=False):
+
+        """
+        :param path: optional directory of the cache.
+        :param ttl: seconds a cached response is valid, None never expires.
+        :param max_size: bytes kept on disk before the least recently used
+        responses are evicted.
+        :param offline: replay cached responses only, expired ones included.
+        :return: None
+        """
+
+        if path is None:
+            path = os.path.dirname(os.path.realpath(__file__)) + "/cache"
+
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.offline = offline
+        self.__lock = threading.Lock()
+
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+
+        self.__size = sum(entry.stat().st_size for entry in self.__entries())
+
+    @staticmethod
+    def key(url, params):
+
+        """
+        :param url: endpoint url.
+        :param params: query string parameters.
+        :return: hex digest identifying the request, independent of the api-key.
+        """
+
+        normalized = sorted((str(name), str(value)) for name, value in params.items() if name != "api-key")
+        request = json.dumps([url.split("://", 1)[-1], normalized], separators=(",", ":"))
+
+        return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+    def __file(self, key):
+
+        """
+        :param key: request key.
+        :return: path of the cached response.
+        """
+
+        return os.path.join(self.path, key[:2], key + ".json.z")
+
+    def __entries(self):
+
+        """
+        :return: iterator over the cached responses.
+        """
+
+        for folder in os.scandir(self.path):
+            if folder.is_dir():
+                for entry in os.scandir(folder.path):
+                    if entry.name.endswith(".json.z"):
+                        yield entry
+
+    def get(self, url, params):
+
+        """
+        :param url: endpoint url.
+        :param params: query string parameters.
+        :return: cached response body (bytes) or None.
+        """
+
+        path = self.__file(self.key(url, params))
+
+        try:
+            stat = os.stat(path)
+            if not self.offline and self.ttl is not None and time.time() - stat.st_mtime > self.ttl:
+                body = None
+            else:
+                with open(path, "rb") as cached:
+                    body = zlib.decompress(cached.read())
+                # The access time orders the eviction, the modification time the ttl
+                os.utime(path, (time.time(), stat.st_mtime))
+        except (OSError, zlib.error):
+            body = None
+
+        if body is None and self.offline:
+            raise CacheMissError("Request not cached: {} {}.".format(url, params))
+
+        return body
+
+    def put(self, url, params, body):
+
+        """
+        :param url: endpoint url.
+        :param params: query string parameters.
+        :param body: response body (bytes).
+        :return: None
+        """
+
+        path = self.__file(self.key(url, params))
+        data = zlib.compress(body)
+        temp = "{}.{}.tmp".format(path, threading.get_ident())
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp, "wb") as cached:
+            cached.write(data)
+
+        with self.__lock:
+            try:
+                self.__size -= os.stat(path).st_size
+            except OSError:
+                pass
+            os.replace(temp, path)
+            self.__size += len(data)
+
+            if self.__size > self.max_size:
+                self.__evict()
+
+    def __evict(self):
+
+        """
+        Remove the least recently used responses until the cache fits in max_size.
+        :return: None
+        """
+
+        entries = sorted(((entry.stat().st_atime, entry.stat().st_size, entry.path) for entry in self.__entries()))
+        target = self.max_size * 0.9
+
+        for _, size, path in entries:
+            if self.__size <= target:
+                break
+            try:
+                os.remove(path)
+                self.__size -= size
+            except OSError:
+                pass
+
+    def clear(self):
+
+        """
+        Remove every cached response.
+        :return: None
+        """
+
+        with self.__lock:
+            for entry in list(self.__entries()):
+                os.remove(entry.path)
+            self.__size = 0
+
+    def size(self):
+
+        """
+        :return: bytes used by the cache.
+        """
+
+        return self.__size
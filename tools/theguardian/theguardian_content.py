@@ -2,8 +2,7 @@
 The content endpoint (/search) returns
 all pieces of content in the API.
 """
-import requests
-import copy
+from tools.theguardian import theguardian_session
 
 
 class Content:
@@ -21,9 +20,10 @@ class Content:
             "format": "json"
         }
         self.__request_response = None
+        self.__response_content = None
 
         if url is None:
-            self.base_url = "https://content.guardianapis.com/search"
+            self.base_url = theguardian_session.endpoint("search")
         else:
             self.base_url = url
 
@@ -31,11 +31,11 @@ class Content:
             for key, value in kwargs.items():
                 self.__headers[key] = value
 
-    def __response(self, headers=None):
+    def __params(self, headers=None):
 
         """
         :param headers: optional header
-        :return: returns raw response.
+        :return: query parameters of the request.
         """
 
         if headers is None:
@@ -43,7 +43,16 @@ class Content:
         else:
             headers.update(self.__headers)
 
-        res = requests.get(self.base_url, headers)
+        return headers
+
+    def __response(self, headers=None):
+
+        """
+        :param headers: optional header
+        :return: returns raw response.
+        """
+
+        res = theguardian_session.get(self.base_url, self.__params(headers))
 
         return res
 
@@ -55,6 +64,7 @@ class Content:
         """
 
         self.__request_response = self.__response(headers)
+        self.__response_content = None
         return self.__request_response
 
     def get_content_response(self, headers=None):
@@ -64,8 +74,20 @@ class Content:
         :return: json content of the response for the request
         """
 
-        self.get_request_response(headers)
-        return self.__request_response.json()
+        self.__request_response = None
+        self.__response_content = theguardian_session.fetch(self.base_url, self.__params(headers))
+        return self.__response_content
+
+    def __decoded_response(self):
+
+        """
+        :return: json content of the last response, decoded only once.
+        """
+
+        if self.__response_content is None:
+            self.__response_content = theguardian_session.decode(self.__request_response)
+
+        return self.__response_content
 
     def response_headers(self, headers=None):
 
@@ -74,14 +96,11 @@ class Content:
         :return: dict of header contents in the response
         """
 
-        if self.__request_response:
-            response_content = copy.deepcopy(self.__request_response.json())
-        else:
-            self.get_request_response(headers)
-            response_content = copy.deepcopy(self.__request_response.json())
+        if self.__request_response is None and self.__response_content is None:
+            self.get_content_response(headers)
 
-        headers_content = response_content['response']
-        headers_content.pop("results")
+        response_content = self.__decoded_response()['response']
+        headers_content = {key: value for key, value in response_content.items() if key != "results"}
 
         return headers_content
 
@@ -99,7 +118,7 @@ class Content:
         ids_and_options = self.__response_for_id(ids, **kwargs)
         ids_and_options.update(self.__headers)
 
-        return self.__response(ids_and_options).json()
+        return theguardian_session.fetch(self.base_url, ids_and_options)
 
     @staticmethod
     def __response_for_id(ids, **kwargs):
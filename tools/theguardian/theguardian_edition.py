@@ -1,7 +1,7 @@
 """
 The edition endpoint returns all editions in the API.
 """
-from theguardian import theguardian_section
+from tools.theguardian import theguardian_section, theguardian_session
 
 
 class Edition(theguardian_section.Section):
@@ -13,5 +13,5 @@ class Edition(theguardian_section.Section):
         :param kwargs: optional headers
         :return:
         """
-        base_url = "http://content.guardianapis.com/editions"
+        base_url = theguardian_session.endpoint("editions")
         super(Edition, self).__init__(api, base_url, **kwargs)
@@ -1,8 +1,7 @@
 """
 The sections endpoint(/sections) returns all sections in the API.
 """
-import requests
-import copy
+from tools.theguardian import theguardian_session
 
 
 class Section:
@@ -16,13 +15,14 @@ class Section:
         """
 
         self.__request_response = None
+        self.__response_content = None
         self.__headers = {
             "api-key": api,
             "format": "json"
         }
 
         if not url:
-            self.base_url = "https://content.guardianapis.com/sections"
+            self.base_url = theguardian_session.endpoint("sections")
         else:
             self.base_url = url
 
@@ -30,18 +30,28 @@ class Section:
             for key, value in kwargs.items():
                 self.__headers[key] = value
 
-    def __response(self, header=None):
+    def __params(self, header=None):
 
         """
         :param header: optional headers
-        :return: raw request response
+        :return: query parameters of the request
         """
 
         if header is None:
             header = self.__headers
         else:
             header.update(self.__headers)
-        res = requests.get(self.base_url, header)
+
+        return header
+
+    def __response(self, header=None):
+
+        """
+        :param header: optional headers
+        :return: raw request response
+        """
+
+        res = theguardian_session.get(self.base_url, self.__params(header))
 
         return res
 
@@ -53,6 +63,7 @@ class Section:
         """
 
         self.__request_response = self.__response(headers)
+        self.__response_content = None
         return self.__request_response
 
     def get_content_response(self, headers=None):
@@ -62,10 +73,22 @@ class Section:
         :return: dict of response
         """
 
-        if self.__request_response is None or headers:
-            self.__request_response = self.get_request_response(headers)
+        if headers or (self.__request_response is None and self.__response_content is None):
+            self.__request_response = None
+            self.__response_content = theguardian_session.fetch(self.base_url, self.__params(headers))
+
+        return self.__decoded_response()
 
-        return self.__request_response.json()
+    def __decoded_response(self):
+
+        """
+        :return: dict of the last response, decoded only once.
+        """
+
+        if self.__response_content is None:
+            self.__response_content = theguardian_session.decode(self.__request_response)
+
+        return self.__response_content
 
     @staticmethod
     def get_results(section_content):
@@ -89,13 +112,10 @@ class Section:
         :return: dict of header contents in the response
         """
 
-        if self.__request_response:
-            response_content = copy.deepcopy(self.__request_response.json())
-        else:
-            self.get_request_response(headers)
-            response_content = copy.deepcopy(self.__request_response.json())
+        if self.__request_response is None and self.__response_content is None:
+            self.get_content_response(headers)
 
-        headers_content = response_content['response']
-        headers_content.pop("results")
+        response_content = self.__decoded_response()['response']
+        headers_content = {key: value for key, value in response_content.items() if key != "results"}
 
         return headers_content
@@ -0,0 +1,366 @@
+"""
+The server module runs a local stand-in of the API.
+It serves /search, /sections, /tags and /editions from
+recorded or synthetic fixtures, with configurable latency,
+page sizes and error injection.
+"""
+import json
+import math
+import time
+import random
+import datetime
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+SECTIONS = ["environment", "world", "science", "uk-news", "us-news", "global-development"]
+EDITIONS = [("uk", "UK edition"), ("us", "US edition"), ("au", "Australia edition"), ("international", "International edition")]
+WORDS = ("storm rain flood drought heat wave snow wind hurricane temperature record climate weather "
+         "forecast season river coast city people government emergency warning damage crops water").split()
+
+
+def synthetic_articles(count=1000, paragraphs=12, seed=0, newest=None, interval=6):
+
+    """
+    :param count: number of articles.
+    :param paragraphs: paragraphs in the body of each article.
+    :param seed: random seed, the same seed generates the same articles.
+    :param newest: publication date of the newest article, defaults to 2017-06-30.
+    :param interval: hours between two publications.
+    :return: list of article results, newest first, shaped as the API results.
+    """
+
+    rand = random.Random(seed)
+    newest = newest or datetime.datetime(2017, 6, 30, 12)
+    articles = []
+
+    for idx in range(count):
+        date = newest - datetime.timedelta(hours=interval * idx)
+        section = rand.choice(SECTIONS)
+        slug = "-".join(rand.sample(WORDS, 4)) + "-{}".format(idx)
+        article_id = "{}/{}/{}".format(section, date.strftime("%Y/%b/%d").lower(), slug)
+        body = "".join("<p>{}.</p>".format(" ".join(rand.choice(WORDS) for _ in range(rand.randint(20, 60))).capitalize())
+                       for _ in range(paragraphs))
+        stamp = date.strftime("%Y-%m-%dT%H:%M:%SZ")
+        articles.append({
+            "id": article_id,
+            "type": "article",
+            "sectionId": section,
+            "sectionName": section.replace("-", " ").title(),
+            "webPublicationDate": stamp,
+            "webTitle": slug.replace("-", " ").capitalize(),
+            "webUrl": "https://www.theguardian.com/" + article_id,
+            "apiUrl": "https://content.guardianapis.com/" + article_id,
+            "fields": {"body": body, "lastModified": stamp},
+            "tags": [{"id": "{}/{}".format(section, word), "type": "keyword", "sectionId": section,
+                      "webTitle": word.capitalize()} for word in rand.sample(WORDS, 3)]
+        })
+
+    return articles
+
+
+def load_fixtures(path):
+
+    """
+    :param path: json file holding a list of recorded API results, or a recorded
+    /search response, e.g. a body kept by theguardian_cache.
+    :return: list of article results.
+    """
+
+    with open(path) as fixtures:
+        content = json.load(fixtures)
+
+    if isinstance(content, dict):
+        content = content["response"]["results"]
+
+    return content
+
+
+class StandInServer:
+
+    def __init__(self, articles=None, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 max_page_size=200, error_rate=0.0, retry_after=1):
+
+        """
+        :param articles: list of article results, defaults to 1000 synthetic articles.
+        :param host: interface to listen on.
+        :param port: port to listen on, 0 picks a free port.
+        :param latency: seconds added to every response.
+        :param jitter: random seconds added on top of the latency.
+        :param max_page_size: largest page-size served.
+        :param error_rate: fraction of the requests answered with 429 or 500.
+        :param retry_after: Retry-After seconds of the injected 429 responses.
+        :return: None
+        """
+
+        self.articles = articles if articles is not None else synthetic_articles()
+        self.articles.sort(key=lambda article: article["webPublicationDate"], reverse=True)
+        self.latency = latency
+        self.jitter = jitter
+        self.max_page_size = max_page_size
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self.bytes_sent = 0
+        self.__lock = threading.Lock()
+        self.__random = random.Random(0)
+        self.__by_id = {article["id"]: article for article in self.articles}
+        self.__thread = None
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.__httpd = ThreadingHTTPServer((host, port), Handler)
+        self.__httpd.daemon_threads = True
+
+    @property
+    def url(self):
+
+        """
+        :return: scheme and host to give to theguardian_session.set_host().
+        """
+
+        host, port = self.__httpd.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+
+        """
+        Serve in a background thread.
+        :return: self
+        """
+
+        self.__thread = threading.Thread(target=self.__httpd.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+
+        """
+        :return: None
+        """
+
+        self.__httpd.shutdown()
+        self.__httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def serve_forever(self):
+
+        """
+        Serve in the calling thread.
+        :return: None
+        """
+
+        self.__httpd.serve_forever()
+
+    def _handle(self, request):
+
+        """
+        :param request: BaseHTTPRequestHandler of the request.
+        :return: None
+        """
+
+        url = urlparse(request.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        endpoint = url.path.strip("/")
+
+        with self.__lock:
+            self.requests += 1
+            draw = self.__random.random()
+
+        delay = self.latency + (self.__random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        headers = {}
+        if draw < self.error_rate / 2:
+            status, content = 429, {"message": "API rate limit exceeded"}
+            headers["Retry-After"] = str(self.retry_after)
+        elif draw < self.error_rate:
+            status, content = 500, {"message": "Internal server error"}
+        elif endpoint == "search":
+            status, content = self.__search(params)
+        elif endpoint in ("sections", "editions"):
+            status, content = self.__list(self.__sections() if endpoint == "sections" else self.__editions(), params)
+        elif endpoint == "tags":
+            status, content = self.__list(self.__tags(params), params)
+        elif endpoint in self.__by_id:
+            status, content = 200, {"response": {"status": "ok", "total": 1,
+                                                 "content": self.__result(self.__by_id[endpoint], params)}}
+        else:
+            status, content = 404, {"response": {"status": "error", "message": "Not found"}}
+
+        body = json.dumps(content).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(body)
+
+        with self.__lock:
+            self.bytes_sent += len(body)
+
+    @staticmethod
+    def __result(article, params):
+
+        """
+        :param article: article result.
+        :param params: query parameters.
+        :return: article with only the requested fields and tags.
+        """
+
+        result = {key: value for key, value in article.items() if key not in ("fields", "tags")}
+        fields = params.get("show-fields")
+        if fields:
+            names = article.get("fields", {}).keys() if fields == "all" else fields.split(",")
+            result["fields"] = {name: article["fields"][name] for name in names if name in article.get("fields", {})}
+        if params.get("show-tags"):
+            result["tags"] = article.get("tags", [])
+
+        return result
+
+    def __paginate(self, results, params):
+
+        """
+        :param results: every result of the request.
+        :param params: query parameters.
+        :return: status and paginated response.
+        """
+
+        page_size = min(int(params.get("page-size", 10)), self.max_page_size)
+        page = int(params.get("page", 1))
+        pages = int(math.ceil(len(results) / page_size))
+
+        if page < 1 or (page > pages and results):
+            return 400, {"response": {"status": "error",
+                                      "message": "requested page is beyond the number of available pages"}}
+
+        start = (page - 1) * page_size
+        return 200, {"response": {"status": "ok", "userTier": "developer", "total": len(results),
+                                  "startIndex": start + 1, "pageSize": page_size, "currentPage": page,
+                                  "pages": pages, "results": results[start:start + page_size]}}
+
+    def __search(self, params):
+
+        """
+        :param params: query parameters, q is not evaluated.
+        :return: status and response of /search.
+        """
+
+        if "ids" in params:
+            ids = params["ids"].split(",")
+            articles = [self.__by_id[article_id] for article_id in ids if article_id in self.__by_id]
+        else:
+            articles = self.articles
+
+        from_date = params.get("from-date", "")[:10]
+        to_date = params.get("to-date", "")[:10]
+        sections = set(params["section"].split("|")) if params.get("section") else None
+        tags = set(params["tag"].split("|")) if params.get("tag") else None
+
+        results = [article for article in articles
+                   if (not from_date or article["webPublicationDate"][:10] >= from_date) and
+                   (not to_date or article["webPublicationDate"][:10] <= to_date) and
+                   (sections is None or article["sectionId"] in sections) and
+                   (tags is None or tags & {tag["id"] for tag in article.get("tags", [])})]
+
+        if params.get("order-by") == "oldest":
+            results = results[::-1]
+
+        status, content = self.__paginate(results, params)
+        if status == 200:
+            content["response"]["orderBy"] = params.get("order-by", "newest")
+            content["response"]["results"] = [self.__result(article, params) for article in content["response"]["results"]]
+
+        return status, content
+
+    def __list(self, results, params):
+
+        """
+        :param results: results of the endpoint.
+        :param params: query parameters.
+        :return: status and response of /sections, /tags or /editions.
+        """
+
+        query = params.get("q", "").lower()
+        if query:
+            results = [result for result in results if query in result["id"] or query in result["webTitle"].lower()]
+
+        if "page" in params or "page-size" in params:
+            return self.__paginate(results, params)
+
+        return 200, {"response": {"status": "ok", "userTier": "developer", "total": len(results), "results": results}}
+
+    def __sections(self):
+
+        """
+        :return: sections of the articles.
+        """
+
+        names = sorted({article["sectionId"]: article.get("sectionName", article["sectionId"])
+                        for article in self.articles}.items())
+
+        return [{"id": section, "webTitle": name, "webUrl": "https://www.theguardian.com/" + section,
+                 "apiUrl": "{}/{}".format(self.url, section), "editions": []} for section, name in names]
+
+    def __tags(self, params):
+
+        """
+        :param params: query parameters, section and type filter the tags.
+        :return: tags of the articles.
+        """
+
+        tags = {}
+        for article in self.articles:
+            for tag in article.get("tags", []):
+                tags.setdefault(tag["id"], tag)
+
+        return [{"id": tag["id"], "type": tag.get("type", "keyword"), "sectionId": tag.get("sectionId"),
+                 "webTitle": tag.get("webTitle", tag["id"]), "webUrl": "https://www.theguardian.com/" + tag["id"],
+                 "apiUrl": "{}/{}".format(self.url, tag["id"])}
+                for tag_id, tag in sorted(tags.items())
+                if (not params.get("section") or tag.get("sectionId") == params["section"]) and
+                (not params.get("type") or tag.get("type", "keyword") == params["type"])]
+
+    def __editions(self):
+
+        """
+        :return: editions of the API.
+        """
+
+        return [{"id": edition, "path": edition, "edition": edition.upper(), "webTitle": title,
+                 "webUrl": "https://www.theguardian.com/" + edition, "apiUrl": "{}/{}".format(self.url, edition)}
+                for edition, title in EDITIONS]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in of the Guardian content API.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fixtures", help="json file of recorded results")
+    parser.add_argument("--articles", type=int, default=1000, help="synthetic articles when no fixtures are given")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--max-page-size", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else synthetic_articles(args.articles)
+    stand_in = StandInServer(fixtures, port=args.port, latency=args.latency, jitter=args.jitter,
+                             max_page_size=args.max_page_size, error_rate=args.error_rate)
+    print("Serving {} articles on {}".format(len(stand_in.articles), stand_in.url))
+    stand_in.serve_forever()
@@ -0,0 +1,309 @@
+"""
+The session module shares a single pooled, keep-alive
+HTTP session between all the theguardian clients and
+decodes every response body only once.
+Requests are paced by a process wide rate limiter and
+retried on throttling and server errors.
+"""
+import json
+import time
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tools.rateLimiter import RateLimiter
+
+API_HOST = "https://content.guardianapis.com"
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+TIMEOUT = 30
+MAX_RETRIES = 5
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_json_loads = json.loads
+_cache = None
+_limiter = RateLimiter()
+
+
+class GuardianAPIError(Exception):
+
+    """
+    Raised when the API refuses a request or keeps failing after the retries.
+    """
+
+    def __init__(self, message, status_code=None):
+        super(GuardianAPIError, self).__init__(message)
+        self.status_code = status_code
+
+
+def get_session():
+
+    """
+    :return: process wide requests session with pooled connections.
+    """
+
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _new_session()
+
+    return _session
+
+
+def _new_session():
+
+    """
+    :return: requests session with POOL_CONNECTIONS pools of POOL_MAXSIZE connections.
+    """
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS,
+                          pool_maxsize=POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+def configure(pool_connections=None, pool_maxsize=None, json_loads=None):
+
+    """
+    :param pool_connections: optional number of host pools to cache.
+    :param pool_maxsize: optional number of connections kept alive per host,
+    should be at least the number of threads requesting pages.
+    :param json_loads: optional callable decoding a bytes body, e.g. orjson.loads.
+    :return: None
+
+    The requests in flight finish on the previous session, which is
+    collected once they are done, the next ones use the new session.
+    """
+
+    global _session, POOL_CONNECTIONS, POOL_MAXSIZE
+
+    if json_loads is not None:
+        set_json_decoder(json_loads)
+
+    if pool_connections is not None or pool_maxsize is not None:
+        with _session_lock:
+            if pool_connections is not None:
+                POOL_CONNECTIONS = pool_connections
+            if pool_maxsize is not None:
+                POOL_MAXSIZE = pool_maxsize
+            if _session is not None:
+                _session = _new_session()
+
+
+def set_host(host):
+
+    """
+    :param host: scheme and host of the API, e.g. a local stand-in server.
+    :return: None
+    """
+
+    global API_HOST
+
+    API_HOST = host.rstrip("/")
+
+
+def endpoint(name):
+
+    """
+    :param name: endpoint name (search, sections, tags, editions).
+    :return: url of the endpoint on the configured host.
+    """
+
+    return "{}/{}".format(API_HOST, name)
+
+
+def set_json_decoder(json_loads):
+
+    """
+    :param json_loads: callable decoding a bytes body into python objects.
+    :return: None
+    """
+
+    global _json_loads
+
+    if not callable(json_loads):
+        raise TypeError("JSON decoder must be callable.")
+
+    _json_loads = json_loads
+
+
+def set_cache(cache):
+
+    """
+    :param cache: theguardian_cache.ResponseCache used by fetch(), None disables it.
+    :return: None
+    """
+
+    global _cache
+
+    _cache = cache
+
+
+def get_cache():
+
+    """
+    :return: response cache used by fetch() or None.
+    """
+
+    return _cache
+
+
+def set_limiter(limiter):
+
+    """
+    :param limiter: tools.rateLimiter.RateLimiter shared by every request.
+    :return: None
+    """
+
+    global _limiter
+
+    _limiter = limiter
+
+
+def get_limiter():
+
+    """
+    :return: rate limiter shared by every request, getRate() reports its current rate.
+    """
+
+    return _limiter
+
+
+def _retry_after(headers):
+
+    """
+    :param headers: response headers.
+    :return: seconds requested by the Retry-After header or None.
+    """
+
+    try:
+        return float(headers["Retry-After"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _quota_pause(headers):
+
+    """
+    :param headers: response headers.
+    :return: seconds to wait when a quota has been exhausted or None.
+    """
+
+    if headers.get("X-RateLimit-Remaining-minute") == "0":
+        return 60 - time.time() % 60
+    if headers.get("X-RateLimit-Remaining-day") == "0":
+        return 24 * 60 * 60 - time.time() % (24 * 60 * 60)
+
+    return None
+
+
+def _send(url, params, decode_body):
+
+    """
+    :param url: endpoint url.
+    :param params: query string parameters.
+    :param decode_body: retry as well when the body is not valid json.
+    :return: raw response and its decoded body (None unless decode_body).
+    """
+
+    limiter = _limiter
+    attempt = 0
+
+    while True:
+        limiter.acquire()
+        retry_after = None
+        try:
+            response = get_session().get(url, params=params, timeout=TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout) as error:
+            failure = GuardianAPIError("Request failed: {}.".format(error))
+        else:
+            quota_pause = _quota_pause(response.headers)
+            if quota_pause:
+                limiter.pause(quota_pause)
+            if response.status_code in RETRY_STATUS:
+                failure = GuardianAPIError("API responded {}.".format(response.status_code), response.status_code)
+                retry_after = _retry_after(response.headers)
+                if response.status_code == 429:
+                    limiter.throttled()
+            elif not decode_body or response.status_code != 200:
+                limiter.succeeded()
+                return response, None
+            else:
+                try:
+                    content = decode(response)
+                except ValueError:
+                    failure = GuardianAPIError("API responded an invalid json body.", response.status_code)
+                else:
+                    limiter.succeeded()
+                    return response, content
+
+        if attempt >= MAX_RETRIES:
+            raise failure
+
+        delay = RateLimiter.backoff(attempt)
+        if retry_after is not None:
+            # Hold every thread, not only this one
+            limiter.pause(retry_after)
+            delay = max(delay, retry_after)
+        time.sleep(delay)
+        attempt += 1
+
+
+def get(url, params):
+
+    """
+    :param url: endpoint url.
+    :param params: query string parameters.
+    :return: raw response, retried on throttling and server errors.
+    """
+
+    return _send(url, params, False)[0]
+
+
+def decode(response):
+
+    """
+    :param response: raw response.
+    :return: decoded json body of the response.
+    """
+
+    return _json_loads(response.content)
+
+
+def fetch(url, params):
+
+    """
+    :param url: endpoint url.
+    :param params: query string parameters.
+    :return: decoded json body, replayed from the response cache when possible.
+    """
+
+    cache = _cache
+
+    if cache is not None:
+        body = cache.get(url, params)
+        if body is not None:
+            return _json_loads(body)
+
+    response, content = _send(url, params, True)
+
+    if response.status_code != 200:
+        try:
+            error = decode(response)
+            message = error["response"]["message"] if "response" in error else error["message"]
+        except (ValueError, KeyError, TypeError):
+            message = response.reason
+        raise GuardianAPIError("API responded {}: {}.".format(response.status_code, message), response.status_code)
+
+    if cache is not None:
+        cache.put(url, params, response.content)
+
+    return content
@@ -3,7 +3,7 @@ The tags endpoint (/tags) returns all tags in the API.
 All Guardian content is manually categorised using these
 tags, of which there are more than 50,000
 """
-from theguardian import theguardian_section
+from tools.theguardian import theguardian_section, theguardian_session
 
 
 class Tag(theguardian_section.Section):
@@ -15,7 +15,7 @@ class Tag(theguardian_section.Section):
         :param kwargs: optional headers
         :return:
         """
-        base_url = "http://content.guardianapis.com/tags"
+        base_url = theguardian_session.endpoint("tags")
         super(Tag, self).__init__(api, base_url, **kwargs)
 
     def get_references_in_page(self, page_number=1):
@@ -0,0 +1,152 @@
+"""
+The taxonomy module keeps the sections and tags of the API
+on disk, so queries can be narrowed with section= and tag=
+filters without requesting /sections or /tags every time.
+"""
+import os
+import json
+import time
+import threading
+
+from tools.theguardian import theguardian_section, theguardian_tag
+
+
+class Taxonomy:
+
+    def __init__(self, api, path=None, ttl=30 * 24 * 60 * 60, tag_type="keyword"):
+
+        """
+        :param api: api-key
+        :param path: optional json file of the taxonomy.
+        :param ttl: seconds the sections and tags are valid, None never expires.
+        :param tag_type: type of the tags looked up, e.g. keyword or series.
+        :return: None
+        """
+
+        if path is None:
+            path = os.path.dirname(os.path.realpath(__file__)) + "/cache/taxonomy.json"
+
+        self.api = api
+        self.path = path
+        self.ttl = ttl
+        self.tag_type = tag_type
+        self.__lock = threading.Lock()
+
+        try:
+            with open(self.path) as taxonomy:
+                self.__taxonomy = json.load(taxonomy)
+        except (OSError, ValueError):
+            self.__taxonomy = {}
+
+        self.__taxonomy.setdefault("sections", None)
+        self.__taxonomy.setdefault("tags", {})
+
+    def __expired(self, entry):
+
+        """
+        :param entry: cached entry holding its "fetched" time.
+        :return: True when the entry must be requested again.
+        """
+
+        return entry is None or (self.ttl is not None and time.time() - entry["fetched"] > self.ttl)
+
+    def __save(self):
+
+        """
+        Write the taxonomy to disk.
+        :return: None
+        """
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp = "{}.{}.tmp".format(self.path, threading.get_ident())
+        with open(temp, "w") as taxonomy:
+            json.dump(self.__taxonomy, taxonomy)
+        os.replace(temp, self.path)
+
+    def sections(self):
+
+        """
+        :return: dict of section id to section title.
+        """
+
+        with self.__lock:
+            entry = self.__taxonomy["sections"]
+            if self.__expired(entry):
+                content = theguardian_section.Section(self.api).get_content_response()
+                entry = {"fetched": time.time(),
+                         "results": {section["id"]: section["webTitle"]
+                                     for section in theguardian_section.Section.get_results(content)}}
+                self.__taxonomy["sections"] = entry
+                self.__save()
+
+        return entry["results"]
+
+    def tags(self, name):
+
+        """
+        :param name: free text looked up in the tags, e.g. weather.
+        :return: dict of tag id to tag title.
+        """
+
+        name = name.lower().strip()
+
+        with self.__lock:
+            entry = self.__taxonomy["tags"].get(name)
+            if self.__expired(entry):
+                tag = theguardian_tag.Tag(self.api, **{"q": name, "type": self.tag_type, "page-size": 200})
+                results = {}
+                page, pages = 1, 1
+                while page <= pages:
+                    content = tag.get_content_response({"page": page})
+                    pages = content["response"].get("pages", 1)
+                    results.update({result["id"]: result["webTitle"] for result in tag.get_results(content)})
+                    page += 1
+                entry = {"fetched": time.time(), "results": results}
+                self.__taxonomy["tags"][name] = entry
+                self.__save()
+
+        return entry["results"]
+
+    def resolve(self, names):
+
+        """
+        :param names: list of sections or tags, by id or title, e.g. ["environment", "weather"].
+        :return: list of section ids and list of tag ids matching the names.
+        """
+
+        sections = self.sections()
+        titles = {title.lower(): section for section, title in sections.items()}
+        section_ids, tag_ids = [], []
+
+        for name in names:
+            key = name.lower().strip()
+            if key in sections:
+                section_ids.append(key)
+            elif key in titles:
+                section_ids.append(titles[key])
+            elif "/" in key:
+                tag_ids.append(key)
+            else:
+                slug = key.replace(" ", "-")
+                found = [tag for tag, title in self.tags(key).items()
+                         if tag.rsplit("/", 1)[-1] == slug or title.lower() == key]
+                if not found:
+                    raise ValueError("No section or tag named {}.".format(name))
+                tag_ids += found
+
+        return section_ids, tag_ids
+
+    def refresh(self):
+
+        """
+        Request the sections and every looked up tag again.
+        :return: None
+        """
+
+        with self.__lock:
+            names = list(self.__taxonomy["tags"])
+            self.__taxonomy = {"sections": None, "tags": {}}
+
+        self.sections()
+        for name in names:
+            self.tags(name)